@@ -0,0 +1,272 @@
+"""
+Benchmark `mspu.pandas.explode_date_range` on random interval tables.
+
+Each single case changes one option (freq, roll, offset, inclusive, drop_index,
+time zone) from the base case and each combined case changes several options,
+every case is run for every table size. The min/median time of the repeats and
+the peak traced memory are saved as JSON, so the results of two commits can be
+compared. Only `explode_date_range` is required, so the script also runs on
+commits before `explode_date_range_counts` was added.
+
+Examples
+--------
+Run the default sizes and save the results::
+
+    python benchmarks/bench_explode_date_range.py -o explode.json
+
+Run some cases on small tables and compare with the results of another commit::
+
+    python benchmarks/bench_explode_date_range.py --sizes 1e3,1e4 \\
+        --cases base,freq_h -o new.json --compare old.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import timeit
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import mspu
+from mspu.data import gen_rand_df
+from mspu.pandas import explode_date_range
+
+try:
+    from mspu.pandas import explode_date_range_counts
+except ImportError:
+    # older commits: the exploded rows are counted after the first run
+    explode_date_range_counts = None
+
+BASE_CASE = dict(freq='30min', inclusive='both', drop_index=True)
+CASES = {
+    'base': {},
+    'freq_5min': dict(freq='5min'),
+    'freq_h': dict(freq='h'),
+    'freq_D': dict(freq='D'),
+    'freq_MS': dict(freq='MS'),
+    'roll': dict(start_date_roll='forward', end_date_roll='backward'),
+    'offset': dict(
+        start_date_offset=pd.DateOffset(hours=1),
+        end_date_offset=pd.DateOffset(hours=-1),
+    ),
+    'inclusive_left': dict(inclusive='left'),
+    'keep_index': dict(drop_index=False),
+    'tz_aware': dict(tz='Australia/Sydney'),
+    'combined': dict(
+        start_date_roll='forward',
+        end_date_roll='backward',
+        start_date_offset=pd.DateOffset(hours=1),
+        end_date_offset=pd.DateOffset(hours=-1),
+        inclusive='left',
+        drop_index=False,
+    ),
+    'combined_tz_h': dict(
+        freq='h',
+        start_date_roll='backward',
+        inclusive='left',
+        drop_index=False,
+        tz='Australia/Sydney',
+    ),
+}
+
+
+def gen_interval_df(nrow: int, rand_seed: int = 11) -> pd.DataFrame:
+    """
+    Generate a random interval table with start/end dates, an index and values.
+
+    The intervals start on the half hour in 2024 and last from 0 to 48 hours,
+    about 48 rows per interval are exploded with the base case.
+    """
+    df = gen_rand_df(
+        nrow=nrow,
+        str_cols={'count': 1, 'name': ['asset'], 'str_cnt': 100},
+        ts_cols={
+            'count': 1,
+            'name': ['start_date'],
+            'freq': '30min',
+            'random': True,
+        },
+        int_cols={'count': 1, 'name': ['hours'], 'low': 0, 'high': 48},
+        float_cols={'count': 1, 'name': ['value']},
+        rand_seed=rand_seed,
+    )
+    df['end_date'] = df['start_date'] + pd.to_timedelta(df.pop('hours'), unit='h')
+    return df.set_index('asset', append=True)
+
+
+def case_kwargs(case: str) -> tuple[dict, str | None]:
+    """
+    Get the explode_date_range keyword arguments and time zone of a case.
+    """
+    kwargs = BASE_CASE | CASES[case]
+    tz = kwargs.pop('tz', None)
+    return kwargs, tz
+
+
+def run_case(
+    df: pd.DataFrame,
+    case: str,
+    repeat: int,
+    max_rows: int,
+) -> dict:
+    """
+    Time and memory-profile one case on one table.
+
+    Cases with more than max_rows exploded rows are skipped, before they are
+    exploded if `explode_date_range_counts` is available. Cases failing on the
+    commit (e.g. tz-aware dates on early commits) have the error instead.
+    """
+    kwargs, tz = case_kwargs(case)
+    if tz is not None:
+        # ambiguous/nonexistent local dates are NaT and the rows are dropped
+        # localize a copy as the table is shared by all cases of a size
+        df = df.assign(
+            **{
+                col: df[col].dt.tz_localize(tz, ambiguous='NaT', nonexistent='NaT')
+                for col in ['start_date', 'end_date']
+            }
+        )
+    params = {k: str(v) for k, v in CASES[case].items()}
+    result = {'case': case, 'nrow': len(df), 'params': params}
+
+    if explode_date_range_counts is not None:
+        _, offsets = explode_date_range_counts(
+            df,
+            'start_date',
+            'end_date',
+            freq=kwargs['freq'],
+            inclusive=kwargs['inclusive'],
+            start_date_offset=kwargs.get('start_date_offset'),
+            end_date_offset=kwargs.get('end_date_offset'),
+            start_date_roll=kwargs.get('start_date_roll'),
+            end_date_roll=kwargs.get('end_date_roll'),
+        )
+        if int(offsets[-1]) > max_rows:
+            result['exploded_rows'] = int(offsets[-1])
+            result['skipped'] = True
+            return result
+
+    def explode():
+        return explode_date_range(df, 'start_date', 'end_date', **kwargs)
+
+    # the first (untimed) run also counts the exploded rows
+    try:
+        result['exploded_rows'] = len(explode())
+    except Exception as e:
+        # an option of the case is not supported by the commit
+        result['error'] = f'{type(e).__name__}: {e}'
+        return result
+    if result['exploded_rows'] > max_rows:
+        result['skipped'] = True
+        return result
+
+    times = timeit.Timer(explode).repeat(repeat=repeat, number=1)
+    result['time_min'] = min(times)
+    result['time_median'] = float(np.median(times))
+
+    tracemalloc.start()
+    explode()
+    result['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result
+
+
+def git_commit() -> str | None:
+    """
+    Get the current git commit, None if not in a git repo.
+    """
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[dict], path: str):
+    """
+    Print the time and memory ratios (new / old) to the results in a JSON file.
+    """
+    with open(path) as f:
+        old = {(r['case'], r['nrow']): r for r in json.load(f)['results']}
+    print(f'\ncompared to {path} (new / old):')
+    for r in results:
+        o = old.get((r['case'], r['nrow']))
+        if o is None or any(x.get(k) for x in (r, o) for k in ('skipped', 'error')):
+            continue
+        time_ratio = r['time_min'] / o['time_min']
+        memory_ratio = r['peak_memory_mb'] / o['peak_memory_mb']
+        print(
+            f'{r["case"]:>15} {r["nrow"]:>10}  '
+            f'time {time_ratio:6.2f}  memory {memory_ratio:6.2f}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument(
+        '--sizes',
+        default='1e3,1e4,1e5,1e6,1e7',
+        help='comma separated numbers of input rows',
+    )
+    parser.add_argument(
+        '--cases',
+        default=','.join(CASES),
+        help=f'comma separated cases from: {", ".join(CASES)}',
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=3, help='the number of timed runs per case'
+    )
+    parser.add_argument(
+        '--max-rows',
+        type=float,
+        default=1e8,
+        help='skip cases with more exploded rows than this',
+    )
+    parser.add_argument('-o', '--output', help='the JSON file to save results to')
+    parser.add_argument('--compare', help='a JSON file of results to compare with')
+    args = parser.parse_args()
+
+    cases = args.cases.split(',')
+    results = []
+    for size in args.sizes.split(','):
+        df = gen_interval_df(int(float(size)))
+        for case in cases:
+            r = run_case(df, case, args.repeat, int(args.max_rows))
+            results.append(r)
+            if r.get('skipped'):
+                print(f'{case:>15} {r["nrow"]:>10}  skipped')
+            elif r.get('error'):
+                print(f'{case:>15} {r["nrow"]:>10}  failed: {r["error"][:60]}')
+            else:
+                print(
+                    f'{case:>15} {r["nrow"]:>10}  {r["time_min"]:8.4f}s  '
+                    f'{r["peak_memory_mb"]:10.1f}MB  {r["exploded_rows"]:>12} rows'
+                )
+
+    if args.output:
+        output = {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'mspu': mspu.__version__,
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+from .utils import datetime_to_interval, interval_to_datetime
+
+__all__ = [
+    'datetime_to_interval',
+    'interval_to_datetime',
+]
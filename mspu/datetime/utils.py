@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+from pandas.tseries.frequencies import to_offset
+from pandas.tseries.offsets import Tick
+
+_INT32_MIN = np.iinfo('int32').min
+_INT32_MAX = np.iinfo('int32').max
+
+
+def _interval_nanos(freq: str | pd.Timedelta) -> int:
+    """
+    Get the width of a fixed interval frequency in nanoseconds.
+    """
+    offset = to_offset(freq)
+    if not isinstance(offset, Tick) or offset.n <= 0:
+        raise ValueError(f'The interval frequency must be fixed and positive: {freq}')
+    return offset.nanos
+
+
+def _epoch_nanos(epoch: str | pd.Timestamp, tz: str | None) -> int:
+    """
+    Get the epoch in UTC nanoseconds, a tz-naive epoch is in the time zone tz.
+    """
+    epoch = pd.Timestamp(epoch)
+    if epoch.tz is None and tz is not None:
+        epoch = epoch.tz_localize(tz)
+    return epoch.as_unit('ns').value
+
+
+def _check_int32(intervals: np.ndarray | pl.Series):
+    """
+    Raise a ValueError if any interval number is out of the int32 range.
+    """
+    if len(intervals) == 0:
+        return
+    lo, hi = intervals.min(), intervals.max()
+    if lo is not None and (lo < _INT32_MIN or hi > _INT32_MAX):
+        raise ValueError(
+            f'Interval numbers from {lo} to {hi} are out of the int32 range, '
+            'use a later epoch or a wider frequency'
+        )
+
+
+def datetime_to_interval(
+    dates: pd.Series | pd.DatetimeIndex | pl.Series | np.ndarray,
+    epoch: str | pd.Timestamp = '2000-01-01',
+    freq: str | pd.Timedelta = '30min',
+) -> pd.Series | pd.Index | pl.Series | np.ndarray:
+    """
+    Convert dates to int32 interval numbers.
+
+    Interval k covers the dates from epoch + k * freq (inclusive) to
+    epoch + (k + 1) * freq (exclusive), so dates are floored to their interval.
+    A tz-naive epoch is in the time zone of tz-aware dates.
+
+    Parameters
+    ----------
+    dates:
+        The dates as a pandas Series/DatetimeIndex, a polars Series
+        or a numpy datetime64 array.
+    epoch:
+        The start date of interval 0.
+    freq:
+        The fixed width of an interval, e.g. '5min', '30min', 'h', 'D'.
+
+    Returns
+    -------
+    pd.Series | pd.Index | pl.Series | np.ndarray
+        The interval numbers with the same type as the dates. Null dates are
+        null interval numbers in pandas (Int32) and polars.
+
+    Raises
+    ------
+    ValueError
+        If freq is not a fixed frequency, an interval number is out of
+        the int32 range or numpy dates have NaT.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mspu.datetime import datetime_to_interval
+    >>> dates = np.array(
+    ...     ['2000-01-01 00:00', '2000-01-01 00:45', '2000-01-02 00:00'],
+    ...     dtype='datetime64[ns]',
+    ... )
+    >>> datetime_to_interval(dates)
+    array([ 0,  1, 48], dtype=int32)
+    """
+    step = _interval_nanos(freq)
+    if isinstance(dates, pl.Series):
+        tz = getattr(dates.dtype, 'time_zone', None)
+        intervals = (dates.dt.epoch('ns') - _epoch_nanos(epoch, tz)) // step
+        _check_int32(intervals)
+        return intervals.cast(pl.Int32)
+
+    if isinstance(dates, np.ndarray):
+        dates = dates.astype('datetime64[ns]')
+        if np.isnat(dates).any():
+            raise ValueError(
+                'Numpy dates cannot have NaT as int32 interval numbers have no '
+                'null, use a pandas or polars Series'
+            )
+        values = dates.view('int64')
+        intervals = (values - _epoch_nanos(epoch, None)) // step
+        _check_int32(intervals)
+        return intervals.astype('int32')
+
+    index = pd.DatetimeIndex(dates)
+    intervals = (index.as_unit('ns').asi8 - _epoch_nanos(epoch, index.tz)) // step
+    isna = index.isna()
+    _check_int32(intervals[~isna])
+    if isna.any():
+        intervals = pd.array(intervals, dtype='Int64')
+        intervals[isna] = pd.NA
+        intervals = intervals.astype('Int32')
+    else:
+        intervals = intervals.astype('int32')
+    if isinstance(dates, pd.Series):
+        return pd.Series(intervals, index=dates.index, name=dates.name)
+    return pd.Index(intervals, name=dates.name)
+
+
+def interval_to_datetime(
+    intervals: pd.Series | pd.Index | pl.Series | np.ndarray,
+    epoch: str | pd.Timestamp = '2000-01-01',
+    freq: str | pd.Timedelta = '30min',
+    tz: str | None = None,
+) -> pd.Series | pd.DatetimeIndex | pl.Series | np.ndarray:
+    """
+    Convert interval numbers to the start dates of the intervals.
+
+    This is the inverse of `datetime_to_interval` for dates on interval starts.
+
+    Parameters
+    ----------
+    intervals:
+        The interval numbers as a pandas Series/Index, a polars Series
+        or a numpy integer array.
+    epoch:
+        The start date of interval 0.
+    freq:
+        The fixed width of an interval, e.g. '5min', '30min', 'h', 'D'.
+    tz:
+        The time zone of the dates (and of a tz-naive epoch), None for tz-naive
+        dates. Numpy dates are tz-naive, in UTC if tz-aware.
+
+    Returns
+    -------
+    pd.Series | pd.DatetimeIndex | pl.Series | np.ndarray
+        The interval start dates with the same type as the interval numbers
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mspu.datetime import interval_to_datetime
+    >>> interval_to_datetime(np.array([0, 1, 48], dtype='int32'))
+    array(['2000-01-01T00:00:00.000000000', '2000-01-01T00:30:00.000000000',
+           '2000-01-02T00:00:00.000000000'], dtype='datetime64[ns]')
+    """
+    step = _interval_nanos(freq)
+    epoch = pd.Timestamp(epoch)
+    if tz is None and epoch.tz is not None:
+        tz = str(epoch.tz)
+    start = _epoch_nanos(epoch, tz)
+
+    if isinstance(intervals, pl.Series):
+        dates = pl.from_epoch(intervals.cast(pl.Int64) * step + start, time_unit='ns')
+        if tz is not None:
+            dates = dates.dt.replace_time_zone('UTC').dt.convert_time_zone(tz)
+        return dates
+
+    if isinstance(intervals, np.ndarray):
+        return (intervals.astype('int64') * step + start).view('datetime64[ns]')
+
+    values = pd.array(intervals, dtype='Int64')
+    dates = values.to_numpy(dtype='int64', na_value=0) * step + start
+    dates = pd.DatetimeIndex(dates.view('datetime64[ns]')).where(~values.isna())
+    if tz is not None:
+        dates = dates.tz_localize('UTC').tz_convert(tz)
+    if isinstance(intervals, pd.Series):
+        return pd.Series(dates, index=intervals.index, name=intervals.name)
+    return dates.rename(intervals.name)
@@ -1,10 +1,30 @@
-from .datetime import explode_date_range
-from .parquet import pa_mod
+from .datetime import (
+    ExplodedView,
+    apply_profile,
+    collapse_date_range,
+    explode_date_range,
+    explode_date_range_counts,
+    interval_overlap_join,
+    interval_timeline_sum,
+    iter_explode_date_range,
+    set_date_range_cache,
+)
+from .parquet import explode_date_range_to_parquet, pa_mod, parquet_diffs
 from .utils import pd_ht, df_diffs
 
 __all__ = [
     'pd_ht',
     'df_diffs',
     'explode_date_range',
+    'collapse_date_range',
+    'explode_date_range_counts',
+    'iter_explode_date_range',
+    'interval_timeline_sum',
+    'set_date_range_cache',
+    'apply_profile',
+    'interval_overlap_join',
+    'ExplodedView',
+    'explode_date_range_to_parquet',
     'pa_mod',
+    'parquet_diffs',
 ]
@@ -1,5 +1,1203 @@
+import numpy as np
 import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from pandas.tseries.offsets import BusinessHour, CustomBusinessHour, Day, Tick, Week
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from os import cpu_count
 from typing import Literal
+from ..datetime import datetime_to_interval
+
+_DAY_NANOS = 86_400_000_000_000
+_FIXED_OFFSET_KWDS = {
+    'weeks',
+    'days',
+    'hours',
+    'minutes',
+    'seconds',
+    'milliseconds',
+    'microseconds',
+    'nanoseconds',
+}
+# exploded rows below which n_jobs falls back to serial
+_PARALLEL_MIN_ROWS = 1_000_000
+
+
+def _fixed_freq_nanos(freq: str) -> int | None:
+    """
+    Get the width of a fixed frequency in nanoseconds, None if not fixed.
+    """
+    offset = to_offset(freq)
+    if isinstance(offset, Tick) and offset.n > 0:
+        return offset.nanos
+    return None
+
+
+def _is_calendar_freq(freq: str) -> bool:
+    """
+    Check if a frequency is anchored to calendar dates (e.g. 'MS', 'QS', 'W-MON').
+
+    The dates of an anchored frequency do not depend on the range start date,
+    so every date range is a slice of one shared calendar grid.
+    """
+    offset = to_offset(freq)
+    if type(offset) is pd.DateOffset or isinstance(
+        offset, (Tick, BusinessHour, CustomBusinessHour)
+    ):
+        return False
+    if isinstance(offset, Week) and offset.weekday is None:
+        return False
+    return offset.n == 1 and not offset.normalize
+
+
+def _repeat_counts(counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get the row position and the slot number within the row of each new row.
+    """
+    offsets = np.cumsum(counts) - counts
+    pos = np.repeat(np.arange(len(counts)), counts)
+    slot = np.arange(counts.sum()) - np.repeat(offsets, counts)
+    return pos, slot
+
+
+class _DateRangeCache:
+    """
+    A process-wide LRU cache of date ranges bounded by the total number of dates.
+    """
+
+    def __init__(self, max_dates: int = 0):
+        self.max_dates = max_dates
+        self.size = 0
+        self.ranges = OrderedDict()
+
+    def get(self, key: tuple, create: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        Get the dates of a key, create and cache the dates if not cached.
+        """
+        if self.max_dates <= 0:
+            return create()
+        dates = self.ranges.get(key)
+        if dates is not None:
+            self.ranges.move_to_end(key)
+            return dates
+        dates = create()
+        if len(dates) <= self.max_dates:
+            self.ranges[key] = dates
+            self.size += len(dates)
+            while self.size > self.max_dates:
+                self.size -= len(self.ranges.popitem(last=False)[1])
+        return dates
+
+    def clear(self):
+        """
+        Remove all cached dates.
+        """
+        self.size = 0
+        self.ranges.clear()
+
+
+_DATE_RANGE_CACHE = _DateRangeCache()
+
+
+def set_date_range_cache(max_dates: int = 0):
+    """
+    Set the size of the process-wide date range cache and clear the cache.
+
+    The loop engine of `explode_date_range` (and frequencies the vectorized
+    engine cannot handle) creates the dates of each unique start/end pair with
+    `pd.date_range`. With the cache, the dates are reused across calls and the
+    least recently used date ranges are evicted when the cache is full.
+
+    Parameters
+    ----------
+    max_dates:
+        The max total number of dates in the cache, 0 to disable the cache.
+
+    Examples
+    --------
+    >>> set_date_range_cache(10_000_000)
+    >>> set_date_range_cache(0)
+    """
+    _DATE_RANGE_CACHE.max_dates = max_dates
+    _DATE_RANGE_CACHE.clear()
+
+
+def _unique_date_ranges(
+    starts: np.ndarray | pd.DatetimeIndex,
+    ends: np.ndarray | pd.DatetimeIndex,
+    freq: str,
+    inclusive_par: dict,
+) -> tuple[np.ndarray, list[np.ndarray]]:
+    """
+    Create the dates of each unique start/end pair with `pd.date_range`.
+
+    Returns the unique pair code of each row and the dates of each unique pair.
+    """
+    start_codes, start_dates = pd.factorize(starts)
+    end_codes, end_dates = pd.factorize(ends)
+    codes, pairs = pd.factorize(start_codes * len(end_dates) + end_codes)
+    start_dates = start_dates[pairs // max(len(end_dates), 1)]
+    end_dates = end_dates[pairs % max(len(end_dates), 1)]
+    par = tuple(inclusive_par.items())
+    ranges = [
+        _DATE_RANGE_CACHE.get(
+            (str(getattr(s, 'tz', None)), s, e, freq, par),
+            lambda s=s, e=e: pd.date_range(
+                start=s, end=e, freq=freq, **inclusive_par
+            ).values.astype('datetime64[ns]'),
+        )
+        for s, e in zip(start_dates, end_dates)
+    ]
+    return codes, ranges
+
+
+def _explode_dates_loop(
+    starts: np.ndarray | pd.DatetimeIndex,
+    ends: np.ndarray | pd.DatetimeIndex,
+    freq: str,
+    inclusive_par: dict,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Explode start/end dates row by row with `pd.date_range`.
+
+    Rows with the same start/end dates share one date range, which is created
+    once and broadcast to the rows.
+    Returns the row position and the exploded date of each new row.
+    """
+    codes, ranges = _unique_date_ranges(starts, ends, freq, inclusive_par)
+    range_counts = np.array([len(r) for r in ranges], dtype='int64')
+    counts = range_counts[codes]
+    pos, slot = _repeat_counts(counts)
+    if len(ranges) == 0:
+        return pos, np.array([], dtype='datetime64[ns]')
+    range_offsets = np.cumsum(range_counts) - range_counts
+    dates = np.concatenate(ranges)[np.repeat(range_offsets[codes], counts) + slot]
+    return pos, dates
+
+
+def _fixed_slots(
+    s: np.ndarray,
+    e: np.ndarray,
+    step: int,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get the first date and slot count of each row for a fixed frequency.
+
+    The start/end dates are int64 nanoseconds.
+    """
+    counts = (e - s) // step + 1
+    if inclusive in ('left', 'neither'):
+        counts -= (e - s) % step == 0
+    if inclusive in ('right', 'neither'):
+        # like `pd.date_range`, a single date range (start == end) is kept
+        counts -= (e != s) if inclusive == 'right' else 1
+        s = s + step * (e != s)
+    counts = np.clip(counts, 0, None)
+    return s, counts
+
+
+def _explode_dates_fixed(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    step: int,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Explode start/end dates with a fixed frequency using int64 nanoseconds.
+
+    The slot count of each row is calculated from the start/end dates,
+    the new rows are then built with `np.repeat` and a cumulative offset array.
+    Returns the row position and the exploded date of each new row.
+    """
+    s = starts.astype('datetime64[ns]').view('int64')
+    e = ends.astype('datetime64[ns]').view('int64')
+    first, counts = _fixed_slots(s, e, step, inclusive)
+    pos, slot = _repeat_counts(counts)
+    dates = (np.repeat(first, counts) + slot * step).view('datetime64[ns]')
+    return pos, dates
+
+
+def _calendar_slots(
+    s: np.ndarray,
+    e: np.ndarray,
+    freq: str,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Get the shared date grid, first grid position and slot count of each row.
+
+    The start/end dates are int64 nanoseconds. Calendar frequencies keep the time
+    of the start date, so rows are grouped by the time of day and each group has
+    its own grid. The grids are concatenated and the positions are global.
+    The grids are the calendar days of one `pd.date_range` plus the time of day,
+    so the grid positions of all rows are found at once with `np.searchsorted`.
+    """
+    if len(s) == 0:
+        return np.array([], dtype='int64'), s.astype('int64'), s.astype('int64')
+    # like `pd.date_range`, a single date range (start == end) is kept
+    single = (s == e) & (inclusive in ('left', 'right'))
+    drop_first = ~single & (inclusive in ('right', 'neither'))
+    drop_last = ~single & (inclusive in ('left', 'neither'))
+    tod = s % _DAY_NANOS
+    tods, groups = np.unique(tod, return_inverse=True)
+    gs_day, ge_day = s - tod, e - e % _DAY_NANOS
+    days = pd.date_range(gs_day.min(), ge_day.max() + _DAY_NANOS, freq=freq).asi8
+    if len(days) == 0:
+        zeros = np.zeros(len(s), dtype='int64')
+        return np.array([], dtype='int64'), zeros, zeros
+
+    # the grid of a group has the days from its min start day to its max end day
+    first_day = np.full(len(tods), np.iinfo('int64').max)
+    last_day = np.full(len(tods), np.iinfo('int64').min)
+    np.minimum.at(first_day, groups, gs_day)
+    np.maximum.at(last_day, groups, ge_day)
+    a = np.searchsorted(days, first_day)
+    n = np.searchsorted(days, last_day + _DAY_NANOS, side='right') - a
+    base = np.cumsum(n) - n
+    group_pos, slot = _repeat_counts(n)
+    grid = days[a[group_pos] + slot] + tods[group_pos]
+    a, n, base = a[groups], n[groups], base[groups]
+
+    def day_at(k):
+        # the day of a group grid position, positions are clipped to the grid
+        return days[np.clip(a + k, 0, len(days) - 1)]
+
+    # `pd.date_range` rolls back the end date with its own time of day
+    # if the start date is on offset but the end date is not
+    k = np.maximum(np.searchsorted(days, ge_day, side='right') - 1 - a, -1)
+    end_day = day_at(np.clip(k, 0, None))
+    k_start = np.searchsorted(days, gs_day, side='left') - a
+    start_on_offset = (n > 0) & (day_at(np.clip(k_start, 0, n - 1)) == gs_day)
+    end_on_offset = (k >= 0) & (end_day == ge_day)
+    roll_back = start_on_offset & ~end_on_offset
+    e = np.where(roll_back, np.where(k >= 0, end_day + e % _DAY_NANOS, s - 1), e)
+    # drop the first/last date if it equals the start/end date
+    k_end = np.clip(np.searchsorted(days, e - tod, side='right') - a, 0, n)
+    last_on_end = ~roll_back & end_on_offset & (k_end > 0)
+    last_on_end &= day_at(np.clip(k_end - 1, 0, None)) + tod == e
+    lo = base + k_start + (drop_first & start_on_offset)
+    hi = base + k_end - (drop_last & last_on_end)
+    counts = np.where(n > 0, np.clip(hi - lo, 0, None), 0)
+    return grid, np.where(n > 0, lo, 0), counts
+
+
+def _explode_dates_calendar(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    freq: str,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Explode start/end dates with a calendar frequency using a shared date grid.
+
+    One date grid is built from the min start date to the max end date,
+    each row then gets its slice of the grid with `np.searchsorted`.
+    Returns the row position and the exploded date of each new row.
+    """
+    s = starts.astype('datetime64[ns]').view('int64')
+    e = ends.astype('datetime64[ns]').view('int64')
+    grid, lo, counts = _calendar_slots(s, e, freq, inclusive)
+    pos, slot = _repeat_counts(counts)
+    dates = grid[np.repeat(lo, counts) + slot].view('datetime64[ns]')
+    return pos, dates
+
+
+def _is_utc_freq(freq: str) -> bool:
+    """
+    Check if tz-aware dates are exploded in UTC (fixed frequencies except daily).
+    """
+    return _fixed_freq_nanos(freq) is not None and not isinstance(to_offset(freq), Day)
+
+
+def _utc_to_tz(dates: np.ndarray, tz: str) -> pd.DatetimeIndex:
+    """
+    Convert UTC dates to tz-aware dates.
+    """
+    return pd.DatetimeIndex(dates).tz_localize('UTC').tz_convert(tz)
+
+
+def _utc_to_local(dates: np.ndarray, tz: str) -> np.ndarray:
+    """
+    Convert UTC dates to local time dates.
+    """
+    return _utc_to_tz(dates, tz).tz_localize(None).to_numpy()
+
+
+def _local_to_utc(dates: np.ndarray, tz: str) -> np.ndarray:
+    """
+    Convert local time dates to UTC dates.
+    """
+    dates = pd.DatetimeIndex(dates).tz_localize(tz).tz_convert('UTC')
+    return dates.tz_localize(None).to_numpy()
+
+
+def _offset_dates(
+    dates: np.ndarray,
+    freq: str,
+    tz: str | None = None,
+    periods: int = 1,
+) -> np.ndarray:
+    """
+    Add periods of the frequency to dates (in UTC if tz-aware).
+
+    Returns the new dates as int64 nanoseconds.
+    """
+    step = _fixed_freq_nanos(freq)
+    if step is not None and (tz is None or _is_utc_freq(freq)):
+        return dates.view('int64') + periods * step
+    offset = periods * to_offset(freq)
+    if tz is None:
+        return (pd.DatetimeIndex(dates) + offset).asi8
+    dates = pd.DatetimeIndex(_utc_to_local(dates, tz)) + offset
+    return _local_to_utc(dates.to_numpy(), tz).view('int64')
+
+
+def _explode_dates(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    freq: str,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+    inclusive_par: dict,
+    engine: Literal['vectorized', 'loop'],
+    tz: str | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Explode start/end dates with the fastest path of the engine.
+
+    The start/end dates and the exploded dates of tz-aware rows are in UTC.
+    Fixed frequencies are exploded in UTC so DST days get their real slot count,
+    daily and calendar frequencies are exploded in local time then localized.
+    Returns the row position and the exploded date of each new row.
+    """
+    step = _fixed_freq_nanos(freq) if engine == 'vectorized' else None
+    if tz is not None and not _is_utc_freq(freq):
+        if step is not None or (engine == 'vectorized' and _is_calendar_freq(freq)):
+            pos, dates = _explode_dates(
+                _utc_to_local(starts, tz),
+                _utc_to_local(ends, tz),
+                freq,
+                inclusive,
+                inclusive_par,
+                engine,
+            )
+            return pos, _local_to_utc(dates, tz)
+        starts, ends = _utc_to_tz(starts, tz), _utc_to_tz(ends, tz)
+    if step is not None:
+        return _explode_dates_fixed(starts, ends, step, inclusive)
+    if engine == 'vectorized' and _is_calendar_freq(freq):
+        return _explode_dates_calendar(starts, ends, freq, inclusive)
+    return _explode_dates_loop(starts, ends, freq, inclusive_par)
+
+
+def _count_dates(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    freq: str,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+    inclusive_par: dict,
+    tz: str | None = None,
+) -> np.ndarray:
+    """
+    Get the number of exploded dates of each row without creating the dates.
+
+    The start/end dates of tz-aware rows are in UTC.
+    """
+    step = _fixed_freq_nanos(freq)
+    if step is not None or _is_calendar_freq(freq):
+        if tz is not None and not _is_utc_freq(freq):
+            starts, ends = _utc_to_local(starts, tz), _utc_to_local(ends, tz)
+        s = starts.astype('datetime64[ns]').view('int64')
+        e = ends.astype('datetime64[ns]').view('int64')
+        if step is not None:
+            return _fixed_slots(s, e, step, inclusive)[1]
+        return _calendar_slots(s, e, freq, inclusive)[2]
+    if tz is not None:
+        starts, ends = _utc_to_tz(starts, tz), _utc_to_tz(ends, tz)
+    codes, ranges = _unique_date_ranges(starts, ends, freq, inclusive_par)
+    return np.array([len(r) for r in ranges], dtype='int64')[codes]
+
+
+def _batch_bounds(counts: np.ndarray, batch_rows: int) -> np.ndarray:
+    """
+    Split rows into batches with at most batch_rows exploded rows in each batch.
+
+    A row with more than batch_rows exploded rows is a batch on its own.
+    Returns the row positions of the batch boundaries.
+    """
+    cum_counts = np.concatenate([[0], np.cumsum(counts)])
+    bounds = [0]
+    while bounds[-1] < len(counts):
+        i = bounds[-1]
+        j = np.searchsorted(cum_counts, cum_counts[i] + batch_rows, side='right') - 1
+        bounds.append(max(j, i + 1))
+    return np.array(bounds)
+
+
+def _fixed_grid(
+    s: np.ndarray,
+    e: np.ndarray,
+    step: int,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Get the shared date grid, first grid position and slot count of each row.
+
+    The start/end dates are int64 nanoseconds. Rows are grouped by the phase of
+    the first date within the frequency and each group has its own grid.
+    The grids are concatenated and the positions are global.
+    """
+    first, counts = _fixed_slots(s, e, step, inclusive)
+    active = counts > 0
+    phases, groups = np.unique(first[active] % step, return_inverse=True)
+    # the grid of a group is from its min first date to its max last date
+    grid_start = np.full(len(phases), np.iinfo('int64').max)
+    np.minimum.at(grid_start, groups, first[active])
+    k = (first[active] - grid_start[groups]) // step
+    n = np.zeros(len(phases), dtype='int64')
+    np.maximum.at(n, groups, k + counts[active])
+    base = np.cumsum(n) - n
+    lo = np.zeros(len(s), dtype='int64')
+    lo[active] = base[groups] + k
+    group_pos, slot = _repeat_counts(n)
+    return grid_start[group_pos] + step * slot, lo, counts
+
+
+def _timeline_slots(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    freq: str,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+    inclusive_par: dict,
+    tz: str | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Get the slot ranges of rows on a shared date grid without exploding the rows.
+
+    The slots of a range are a slice of the grid from the first grid position.
+    Fixed and calendar frequencies have one range for each row, other frequencies
+    are exploded row by row and each date is a range of one slot.
+    Returns the grid (int64 nanoseconds in UTC if tz-aware), the first grid
+    position, the slot count and the row position of each range.
+    """
+    step = _fixed_freq_nanos(freq)
+    if step is None and not _is_calendar_freq(freq):
+        pos, dates = _explode_dates(
+            starts, ends, freq, inclusive, inclusive_par, 'loop', tz
+        )
+        grid, lo = np.unique(dates.view('int64'), return_inverse=True)
+        return grid, lo, np.ones(len(lo), dtype='int64'), pos
+
+    local = tz is not None and not _is_utc_freq(freq)
+    if local:
+        starts, ends = _utc_to_local(starts, tz), _utc_to_local(ends, tz)
+    s = starts.astype('datetime64[ns]').view('int64')
+    e = ends.astype('datetime64[ns]').view('int64')
+    if step is not None:
+        grid, lo, counts = _fixed_grid(s, e, step, inclusive)
+    else:
+        grid, lo, counts = _calendar_slots(s, e, freq, inclusive)
+    if local:
+        grid = _local_to_utc(grid.view('datetime64[ns]'), tz).view('int64')
+    return grid, lo, counts, np.arange(len(s))
+
+
+def _freq_groups(
+    df: pd.DataFrame,
+    freq: str,
+    freq_col: str = None,
+) -> list[tuple[str, np.ndarray | None]]:
+    """
+    Get the frequency and row positions of each group of rows with the same frequency.
+
+    If freq_col is None, all rows have the frequency freq and the positions
+    are None. Rows with a null value in freq_col have the frequency freq.
+    """
+    if freq_col is None:
+        return [(freq, None)]
+    freqs = df[freq_col].fillna(freq)
+    return list(freqs.groupby(freqs, sort=False).indices.items())
+
+
+def _count_rows(
+    df: pd.DataFrame,
+    start_date_col: str,
+    end_date_col: str,
+    freq: str,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+    inclusive_par: dict,
+    freq_col: str = None,
+) -> np.ndarray:
+    """
+    Get the number of exploded dates of each prepared row.
+    """
+    tz = getattr(df[start_date_col].dtype, 'tz', None)
+    starts = _date_values(df[start_date_col])
+    ends = _date_values(df[end_date_col])
+    counts = np.zeros(len(df), dtype='int64')
+    for f, rows in _freq_groups(df, freq, freq_col):
+        if rows is None:
+            return _count_dates(starts, ends, f, inclusive, inclusive_par, tz)
+        counts[rows] = _count_dates(
+            starts[rows], ends[rows], f, inclusive, inclusive_par, tz
+        )
+    return counts
+
+
+def _index_levels(
+    df: pd.DataFrame,
+    start_date_col: str,
+    end_date_col: str,
+    date_col: str,
+    drop_date_cols: bool,
+) -> tuple[pd.DataFrame, list[str], list[str]]:
+    """
+    Name the index levels and get the index levels of the exploded DataFrame.
+
+    Returns the DataFrame with named index levels,
+    the temporary and the original names of the exploded index levels.
+    """
+    levels_old = list(df.index.names)
+    index_names = [
+        f'_idx{i}' if name is None else name for i, name in enumerate(levels_old)
+    ]
+    df = df.rename_axis(index_names, axis=0)
+    if start_date_col in df.columns and end_date_col in df.columns:
+        levels = index_names
+    else:
+        if drop_date_cols:
+            levels = [
+                level
+                for level in index_names
+                if level not in (start_date_col, end_date_col)
+            ]
+            levels_old = [
+                level
+                for level in levels_old
+                if level not in (start_date_col, end_date_col)
+            ]
+        else:
+            levels = index_names
+            # move start/end_date_col to index if one exists
+            if start_date_col in df.columns:
+                levels += [start_date_col]
+                levels_old += [start_date_col]
+            elif end_date_col in df.columns:
+                levels += [end_date_col]
+                levels_old += [end_date_col]
+        levels += [date_col]
+        levels_old += [date_col]
+    return df, levels, levels_old
+
+
+def _split_index(
+    df: pd.DataFrame,
+    start_date_col: str,
+    end_date_col: str,
+) -> tuple[pd.DataFrame, pd.Index]:
+    """
+    Move the start/end date index levels to columns and split off the other levels.
+
+    Returns the DataFrame with a range index and the other index levels.
+    """
+    date_levels = [
+        level for level in df.index.names if level in (start_date_col, end_date_col)
+    ]
+    if date_levels:
+        df = df.reset_index(level=date_levels)
+    return df.reset_index(drop=True), df.index
+
+
+def _set_exploded_index(
+    df: pd.DataFrame,
+    index: pd.Index,
+    levels: list[str],
+    levels_old: list[str],
+) -> pd.DataFrame:
+    """
+    Set the index levels of the exploded DataFrame with the source row positions.
+
+    The source index levels are repeated by their codes without hashing the
+    exploded rows, the other levels (e.g. the new date column) are factorized.
+    """
+    pos = df.index.to_numpy()
+    if isinstance(index, pd.MultiIndex):
+        index_codes, index_uniques = index.codes, index.levels
+    else:
+        index_codes, index_uniques = index.factorize()
+        index_codes, index_uniques = [index_codes], [index_uniques]
+    codes, uniques = [], []
+    for level in levels:
+        if level in index.names:
+            i = index.names.index(level)
+            codes.append(index_codes[i][pos])
+            uniques.append(index_uniques[i])
+        else:
+            level_codes, level_uniques = df[level].factorize()
+            codes.append(level_codes)
+            uniques.append(level_uniques)
+    df = df.drop(columns=[level for level in levels if level not in index.names])
+    df.index = pd.MultiIndex(
+        levels=uniques, codes=codes, names=levels_old, verify_integrity=False
+    )
+    if len(levels) == 1:
+        df.index = df.index.get_level_values(0)
+    return df
+
+
+def _date_values(dates: pd.Series) -> np.ndarray:
+    """
+    Get the datetime64[ns] values of a date column, in UTC if tz-aware.
+    """
+    if isinstance(dates.dtype, pd.DatetimeTZDtype):
+        dates = dates.dt.tz_convert('UTC').dt.tz_localize(None)
+    return dates.to_numpy()
+
+
+def _to_timestamp(date: str | pd.Timestamp, tz: str | None) -> pd.Timestamp:
+    """
+    Convert a date to timestamp in the time zone of the date column.
+    """
+    date = pd.to_datetime(date, dayfirst=True)
+    if tz is not None:
+        date = date.tz_localize(tz) if date.tz is None else date.tz_convert(tz)
+    return date
+
+
+def _offset_nanos(offset: pd.DateOffset | pd.Timedelta) -> int | None:
+    """
+    Get the width of a date offset in nanoseconds, None if not fixed.
+
+    A `pd.DateOffset` is fixed if it only has relative units up to weeks.
+    """
+    if isinstance(offset, (timedelta, np.timedelta64)):
+        return pd.Timedelta(offset).value
+    if isinstance(offset, Tick):
+        return offset.nanos
+    if (
+        type(offset) is pd.DateOffset
+        and not offset.normalize
+        and offset.kwds.keys() <= _FIXED_OFFSET_KWDS
+    ):
+        return offset.n * pd.Timedelta(**offset.kwds).value
+    return None
+
+
+def _offset_date_col(
+    dates: pd.Series,
+    offset: pd.DateOffset | pd.Timedelta,
+) -> pd.Series:
+    """
+    Add the date offset to the dates.
+
+    Fixed offsets of tz-naive dates are added as int64 nanoseconds, other
+    offsets (e.g. months or days in local time) are applied by the offset.
+    """
+    nanos = _offset_nanos(offset)
+    if nanos is None or getattr(dates.dtype, 'tz', None) is not None:
+        return dates + offset
+    return dates + pd.Timedelta(nanos)
+
+
+def _roll_dates(
+    dates: pd.Series,
+    freq: str,
+    roll: Literal['backward', 'forward'],
+) -> pd.Series:
+    """
+    Roll the dates to the start of the current/next period.
+
+    Tz-naive dates with a fixed frequency are rolled with int64 arithmetic.
+    Tz-aware dates are rolled in local time, ambiguous dates keep their DST flag.
+    """
+    roll_freq = freq if freq[-1] != 'S' else freq[:-1]
+    extra_period = 0 if roll == 'backward' else 1
+    tz = getattr(dates.dtype, 'tz', None)
+
+    # like `to_period`, fixed frequencies are floored to their base unit
+    #   (e.g. minutes for '30min') and a period adds the full frequency
+    step = _fixed_freq_nanos(freq) if roll_freq == freq else None
+    if tz is None and step is not None:
+        base = step // to_offset(freq).n
+        values = dates.to_numpy().view('int64')
+        values = values // base * base + extra_period * step
+        dates_rolled = pd.Series(values.view('datetime64[ns]'), index=dates.index)
+        return dates_rolled.where(dates.notna())
+
+    if tz is not None:
+        local = dates.dt.tz_localize(None)
+        is_dst = local.dt.tz_localize(tz, ambiguous=True, nonexistent='NaT') == dates
+        dates, is_dst = local, is_dst.to_numpy()
+    dates = (dates.dt.to_period(roll_freq) + extra_period).dt.start_time
+    if tz is not None:
+        dates = dates.dt.tz_localize(tz, ambiguous=is_dst, nonexistent='shift_forward')
+    return dates
+
+
+def _roll_date_col(
+    df: pd.DataFrame,
+    date_col: str,
+    freq: str,
+    roll: Literal['backward', 'forward'],
+    freq_col: str = None,
+) -> pd.Series:
+    """
+    Roll the dates of a column with the frequency (column) of each row.
+    """
+    groups = _freq_groups(df, freq, freq_col)
+    if groups and groups[0][1] is None:
+        return _roll_dates(df[date_col], freq, roll)
+    if not groups:
+        return df[date_col]
+    dates = [_roll_dates(df[date_col].iloc[rows], f, roll) for f, rows in groups]
+    return pd.concat(dates).reindex(df.index)
+
+
+def _prepare_date_range(
+    df: pd.DataFrame,
+    start_date_col: str,
+    end_date_col: str,
+    freq: str,
+    start_date_offset: pd.DateOffset,
+    end_date_offset: pd.DateOffset,
+    start_date_roll: Literal['backward', 'forward'] | None,
+    end_date_roll: Literal['backward', 'forward'] | None,
+    min_date: str | pd.Timestamp,
+    max_date: str | pd.Timestamp,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+    freq_col: str = None,
+) -> tuple[pd.DataFrame, str, dict]:
+    """
+    Offset, roll and limit the start/end dates of a DataFrame with reset index.
+
+    Returns the DataFrame, the inclusive and the `pd.date_range` inclusive parameter.
+    """
+    # keep the time zone of tz-aware start dates
+    tz = getattr(df[start_date_col].dtype, 'tz', None)
+    dtype = 'datetime64[ns]' if tz is None else pd.DatetimeTZDtype('ns', tz)
+    df = df.astype(
+        {
+            start_date_col: dtype,
+            end_date_col: dtype,
+        }
+    )
+
+    # offset start date
+    if start_date_offset is not None:
+        df[start_date_col] = _offset_date_col(df[start_date_col], start_date_offset)
+
+    # roll start date
+    if start_date_roll is not None:
+        df[start_date_col] = _roll_date_col(
+            df, start_date_col, freq, start_date_roll, freq_col
+        )
+
+    # limit start_date and replace null with min_date
+    if min_date is not None:
+        min_date = _to_timestamp(min_date, tz)
+        df[start_date_col] = (
+            df[start_date_col]
+            .fillna(min_date)
+            .where(df[start_date_col] > min_date, min_date)
+        )
+
+    # offset end date
+    if end_date_offset is not None:
+        df[end_date_col] = _offset_date_col(df[end_date_col], end_date_offset)
+
+    # roll end date
+    if end_date_roll is not None:
+        df[end_date_col] = _roll_date_col(
+            df, end_date_col, freq, end_date_roll, freq_col
+        )
+
+    # limit end_date and replace null with max_date
+    if max_date is not None:
+        max_date = _to_timestamp(max_date, tz)
+        df[end_date_col] = (
+            df[end_date_col]
+            .fillna(max_date)
+            .where(df[end_date_col] < max_date, max_date)
+        )
+
+    # FIXME: special regarding pandas version
+    pd_version = tuple(int(n) for n in pd.__version__.split('.')[:3])
+    if pd_version >= (1, 4, 0):
+        inclusive_par = {'inclusive': inclusive}
+    else:
+        if inclusive == 'neither':
+            inclusive = 'right'
+            df[end_date_col] -= pd.DateOffset(microseconds=1)
+        inclusive_par = {'closed': None if inclusive == 'both' else inclusive}
+
+    return df, inclusive, inclusive_par
+
+
+def _valid_date_range(
+    df: pd.DataFrame,
+    start_date_col: str,
+    end_date_col: str,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+) -> pd.Series:
+    """
+    Get the mask of rows with valid start/end dates.
+
+    If inclusive = 'left' we expect date_end is exclusive
+    so records with start_date == end_date are not valid.
+    """
+    if inclusive == 'left':
+        return df[start_date_col] < df[end_date_col]
+    return df[start_date_col] <= df[end_date_col]
+
+
+def _apportion_weights(
+    pos: np.ndarray,
+    dates: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    freq: str,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+    apportion_method: Literal['even', 'duration'],
+    tz: str | None = None,
+) -> np.ndarray:
+    """
+    Get the weight of each exploded row, the weights of a source row sum to 1.
+
+    With the 'duration' method, a date is the start of its slot (the end of its
+    slot if inclusive = 'right') and the weight is the slot duration within
+    the start/end dates. Rows without any duration are apportioned evenly.
+    """
+    nrow = len(starts)
+    counts = np.bincount(pos, minlength=nrow)
+    weights = 1 / np.repeat(counts, counts)
+    if apportion_method == 'duration':
+        dt = dates.view('int64')
+        other = _offset_dates(dates, freq, tz, -1 if inclusive == 'right' else 1)
+        s = starts.astype('datetime64[ns]').view('int64')[pos]
+        e = ends.astype('datetime64[ns]').view('int64')[pos]
+        slot_start = np.maximum(np.minimum(dt, other), s)
+        slot_end = np.minimum(np.maximum(dt, other), e)
+        durations = np.clip(slot_end - slot_start, 0, None).astype('float64')
+        total = np.bincount(pos, weights=durations, minlength=nrow)[pos]
+        weights = np.where(total > 0, durations / np.maximum(total, 1), weights)
+    return weights
+
+
+def _encode_strings(
+    df: pd.DataFrame,
+    encode_strings: Literal['category', 'dictionary'],
+) -> pd.DataFrame:
+    """
+    Convert the string columns to categorical or dictionary-encoded columns.
+
+    The values of an encoded column are small integer codes into one shared
+    dictionary, so the repeated rows of an exploded column do not copy strings.
+    """
+    if encode_strings == 'category':
+        dtype = 'category'
+    else:
+        import pyarrow as pa
+
+        dtype = pd.ArrowDtype(pa.dictionary(pa.int32(), pa.string()))
+    cols = [
+        col
+        for col in df.columns
+        if pd.api.types.infer_dtype(df[col], skipna=True) == 'string'
+    ]
+    return df.astype(dict.fromkeys(cols, dtype))
+
+
+def _take_arrow(
+    df: pd.DataFrame,
+    pos: np.ndarray,
+    date_col: str,
+    dates: np.ndarray,
+    tz: str | None = None,
+) -> pd.DataFrame:
+    """
+    Take the rows with `pa.Table.take` and set the dates as an Arrow timestamp column.
+
+    The dates are in UTC if tz-aware, interval numbers are set as they are.
+    The columns of the new DataFrame are pyarrow-backed (`pd.ArrowDtype`) and
+    the rows keep the source row index.
+    """
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False).take(pos)
+    if dates.dtype.kind == 'M':
+        dates = pa.array(
+            dates.view('int64'),
+            type=pa.timestamp('ns', None if tz is None else str(tz)),
+        )
+    else:
+        dates = pa.array(dates)
+    if table.num_columns == 0:
+        # a table without columns has no rows to take
+        table = pa.table({date_col: dates})
+    elif date_col in table.column_names:
+        table = table.set_column(table.column_names.index(date_col), date_col, dates)
+    else:
+        table = table.append_column(date_col, dates)
+    df_taken = table.to_pandas(types_mapper=pd.ArrowDtype)
+    df_taken.index = df.index[pos]
+    return df_taken
+
+
+def _explode_positions(
+    df: pd.DataFrame,
+    start_date_col: str,
+    end_date_col: str,
+    freq: str,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+    inclusive_par: dict,
+    engine: Literal['vectorized', 'loop'],
+    apportion_cols: list[str] | None,
+    apportion_method: Literal['even', 'duration'],
+    freq_col: str = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    """
+    Get the source row positions, the dates and the apportion weights (None if no
+    apportion_cols) of the exploded rows, the dates are in UTC if tz-aware.
+    """
+    tz = getattr(df[start_date_col].dtype, 'tz', None)
+    starts = _date_values(df[start_date_col])
+    ends = _date_values(df[end_date_col])
+    groups = _freq_groups(df, freq, freq_col)
+    pos, dates, weights = [], [], []
+    for f, rows in groups:
+        s, e = (starts, ends) if rows is None else (starts[rows], ends[rows])
+        pos_f, dates_f = _explode_dates(s, e, f, inclusive, inclusive_par, engine, tz)
+        # spread values of source rows across exploded rows
+        if apportion_cols:
+            weights.append(
+                _apportion_weights(
+                    pos_f, dates_f, s, e, f, inclusive, apportion_method, tz
+                )
+            )
+        pos.append(pos_f if rows is None else rows[pos_f])
+        dates.append(dates_f)
+
+    if len(groups) == 1:
+        return pos[0], dates[0], weights[0] if apportion_cols else None
+
+    # the exploded rows of a frequency column are sorted back to the row order
+    pos = np.concatenate([np.array([], dtype='int64'), *pos])
+    order = np.argsort(pos, kind='stable')
+    dates = np.concatenate([np.array([], dtype='datetime64[ns]'), *dates])[order]
+    if apportion_cols:
+        weights = np.concatenate([np.array([]), *weights])[order]
+    else:
+        weights = None
+    return pos[order], dates, weights
+
+
+def _take_exploded(
+    df: pd.DataFrame,
+    pos: np.ndarray,
+    dates: np.ndarray,
+    weights: np.ndarray | None,
+    start_date_col: str,
+    end_date_col: str,
+    date_col: str,
+    freq: str,
+    drop_date_cols: bool,
+    apportion_cols: list[str] | None,
+    encode_strings: Literal['category', 'dictionary'] | None = None,
+    dtype_backend: Literal['pyarrow'] | None = None,
+    interval_epoch: str | pd.Timestamp = None,
+) -> pd.DataFrame:
+    """
+    Take the exploded rows of the prepared rows and set the date column.
+    """
+    tz = getattr(df[start_date_col].dtype, 'tz', None)
+
+    # drop start_date_col and end_date_col
+    if drop_date_cols:
+        df = df.drop(columns=[start_date_col, end_date_col])
+
+    # encode strings before the repeated rows are created
+    if encode_strings is not None:
+        df = _encode_strings(df, encode_strings)
+
+    # interval numbers are calculated from the UTC dates
+    if interval_epoch is not None:
+        epoch = _to_timestamp(interval_epoch, tz)
+        if epoch.tz is not None:
+            epoch = epoch.tz_convert('UTC').tz_localize(None)
+        dates = datetime_to_interval(dates, epoch, freq)
+
+    # sample df based on new timestamp column
+    if dtype_backend == 'pyarrow':
+        df = _take_arrow(df, pos, date_col, dates, tz)
+    else:
+        df = df.take(pos)
+        if tz is not None and interval_epoch is None:
+            dates = _utc_to_tz(dates, tz).array
+        df[date_col] = dates
+
+    if apportion_cols:
+        df[apportion_cols] = df[apportion_cols].mul(weights, axis=0)
+    return df
+
+
+def _check_interval_epoch(interval_epoch: str | pd.Timestamp, freq_col: str | None):
+    """
+    Raise a ValueError if interval_epoch is used with freq_col.
+    """
+    if interval_epoch is not None and freq_col is not None:
+        raise ValueError(
+            'interval_epoch needs one interval width for all rows, '
+            'it cannot be used with freq_col'
+        )
+
+
+def _explode_rows(
+    df: pd.DataFrame,
+    start_date_col: str,
+    end_date_col: str,
+    date_col: str,
+    freq: str,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+    inclusive_par: dict,
+    drop_date_cols: bool,
+    engine: Literal['vectorized', 'loop'],
+    apportion_cols: list[str] | None,
+    apportion_method: Literal['even', 'duration'],
+    encode_strings: Literal['category', 'dictionary'] | None = None,
+    dtype_backend: Literal['pyarrow'] | None = None,
+    interval_epoch: str | pd.Timestamp = None,
+    freq_col: str = None,
+) -> pd.DataFrame:
+    """
+    Explode the prepared rows, the new rows keep the index of the source rows.
+    """
+    _check_interval_epoch(interval_epoch, freq_col)
+    pos, dates, weights = _explode_positions(
+        df,
+        start_date_col,
+        end_date_col,
+        freq,
+        inclusive,
+        inclusive_par,
+        engine,
+        apportion_cols,
+        apportion_method,
+        freq_col,
+    )
+    return _take_exploded(
+        df,
+        pos,
+        dates,
+        weights,
+        start_date_col,
+        end_date_col,
+        date_col,
+        freq,
+        drop_date_cols,
+        apportion_cols,
+        encode_strings,
+        dtype_backend,
+        interval_epoch,
+    )
+
+
+def _explode_rows_parallel(
+    df: pd.DataFrame,
+    start_date_col: str,
+    end_date_col: str,
+    date_col: str,
+    freq: str,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+    inclusive_par: dict,
+    drop_date_cols: bool,
+    engine: Literal['vectorized', 'loop'],
+    apportion_cols: list[str] | None,
+    apportion_method: Literal['even', 'duration'],
+    encode_strings: Literal['category', 'dictionary'] | None,
+    dtype_backend: Literal['pyarrow'] | None,
+    interval_epoch: str | pd.Timestamp,
+    freq_col: str | None,
+    n_jobs: int,
+) -> pd.DataFrame:
+    """
+    Explode the prepared rows in partitions of consecutive rows in worker processes.
+
+    The partitions have about the same number of exploded rows. The workers only
+    get the date (and frequency) columns of a partition and return the source row
+    positions, dates and weights as numpy arrays, so little is pickled and the
+    rows are taken once in the current process, the result is the same as
+    `_explode_rows`. Inputs with fewer than _PARALLEL_MIN_ROWS exploded rows are
+    exploded serially.
+    """
+    if n_jobs == 0:
+        raise ValueError('n_jobs must be a positive number of processes or negative')
+    if n_jobs < 0:
+        n_jobs = max((cpu_count() or 1) + 1 + n_jobs, 1)
+    _check_interval_epoch(interval_epoch, freq_col)
+    counts = _count_rows(
+        df, start_date_col, end_date_col, freq, inclusive, inclusive_par, freq_col
+    )
+    total = int(counts.sum())
+    if n_jobs == 1 or len(df) < 2 or total < _PARALLEL_MIN_ROWS:
+        return _explode_rows(
+            df,
+            start_date_col,
+            end_date_col,
+            date_col,
+            freq,
+            inclusive,
+            inclusive_par,
+            drop_date_cols,
+            engine,
+            apportion_cols,
+            apportion_method,
+            encode_strings,
+            dtype_backend,
+            interval_epoch,
+            freq_col,
+        )
+
+    date_df = df[[start_date_col, end_date_col] + ([freq_col] if freq_col else [])]
+    bounds = _batch_bounds(counts, -(-total // n_jobs))
+    with ProcessPoolExecutor(max_workers=min(n_jobs, len(bounds) - 1)) as executor:
+        futures = [
+            executor.submit(
+                _explode_positions,
+                date_df.iloc[i:j],
+                start_date_col,
+                end_date_col,
+                freq,
+                inclusive,
+                inclusive_par,
+                engine,
+                apportion_cols,
+                apportion_method,
+                freq_col,
+            )
+            for i, j in zip(bounds[:-1], bounds[1:])
+        ]
+        results = [future.result() for future in futures]
+    # the positions of a partition are relative to its first row
+    pos = np.concatenate([p + i for (p, _, _), i in zip(results, bounds[:-1])])
+    dates = np.concatenate([d for _, d, _ in results])
+    weights = np.concatenate([w for _, _, w in results]) if apportion_cols else None
+    return _take_exploded(
+        df,
+        pos,
+        dates,
+        weights,
+        start_date_col,
+        end_date_col,
+        date_col,
+        freq,
+        drop_date_cols,
+        apportion_cols,
+        encode_strings,
+        dtype_backend,
+        interval_epoch,
+    )
 
 
 def explode_date_range(
@@ -17,246 +1215,986 @@ def explode_date_range(
     inclusive: Literal['both', 'left', 'right', 'neither'] = 'both',
     drop_index: bool = True,
     drop_date_cols: bool = True,
-) -> pd.DataFrame:
+    engine: Literal['vectorized', 'loop'] = 'vectorized',
+    apportion_cols: list[str] = None,
+    apportion_method: Literal['even', 'duration'] = 'even',
+    encode_strings: Literal['category', 'dictionary'] | None = None,
+    dtype_backend: Literal['pyarrow'] | None = None,
+    interval_epoch: str | pd.Timestamp = None,
+    n_jobs: int = None,
+    freq_col: str = None,
+) -> pd.DataFrame:
+    """
+    Explode DataFrame start/end date columns to date column.
+
+    Tz-aware start/end dates keep their time zone. Fixed frequencies are
+    exploded in UTC, so DST days have 46 or 50 slots of 30 minutes;
+    daily and calendar frequencies are exploded in local time.
+
+    Parameters
+    ----------
+    df:
+        The input DataFrame with start/end date columns/index levels.
+    start_date_col:
+        The column name in the DataFrame for the start date.
+    end_date_col:
+        The column name in the DataFrame for the end date.
+    date_col:
+        The column name in the DataFrame for the new date.
+    freq:
+        The frequency of the new date column.
+    start_date_offset:
+        The date offset for the start date column.
+    end_date_offset:
+        The date offset for the end date column.
+    start_date_roll:
+        Roll the start_date to the start of the current/next period.
+    end_date_roll:
+        Roll the end date to the start of the current/next period.
+    min_date:
+        The min value of the start date after offset.
+    max_date:
+        The max value of the end date after offset.
+    inclusive:
+        Include boundaries; Whether to set each bound as closed or open.
+    drop_index:
+        This flag should be False when the input DataFrame has meaningful index.
+    drop_date_cols:
+        Whether to drop the start_date_col and end_date_col or not.
+    engine:
+        The engine used to explode the dates. The 'vectorized' engine builds
+        the new rows with int64 arithmetic for fixed frequencies (e.g. 'min',
+        'h', 's', 'D'), slices a shared date grid for calendar frequencies
+        (e.g. 'MS', 'QS', 'W-MON', 'YS') and falls back to 'loop' otherwise.
+        The 'loop' engine calls `pd.date_range` for each row.
+    apportion_cols:
+        The numeric columns to spread across the exploded rows of each row.
+    apportion_method:
+        Spread the values evenly or weighted by the slot duration within the
+        start/end dates, where a date is the start of its slot
+        (the end of its slot if inclusive = 'right').
+    encode_strings:
+        Convert the string columns to 'category' or 'dictionary'
+        (`dictionary<values=string, indices=int32>[pyarrow]`) before exploding,
+        so the exploded rows share one copy of each string.
+    dtype_backend:
+        The backend of the new DataFrame, None for numpy-backed columns.
+        With 'pyarrow', the date column is created as an Arrow timestamp array
+        and the other columns are repeated with `pa.Table.take`, all columns
+        are `pd.ArrowDtype` so they can be passed to pyarrow/polars without a copy.
+    interval_epoch:
+        If given, the new date column has the int32 interval numbers of the dates
+        from this epoch in fixed freq intervals (see
+        `mspu.datetime.datetime_to_interval`) instead of the dates.
+        It cannot be used with freq_col.
+    n_jobs:
+        The number of worker processes, -1 for all CPUs. The input rows are split
+        into consecutive partitions with about the same number of exploded rows,
+        so the new rows keep the input row order. Small inputs (fewer than
+        1 million exploded rows) are exploded in the current process.
+    freq_col:
+        The name of a column with the frequency of each row, rows with a null
+        frequency have the frequency freq. Rows are exploded in groups of the same
+        frequency and the new rows keep the input row order.
+
+    Returns
+    -------
+    pl.DataFrame
+        The DataFrame same as the input but with
+        start/end date columns replaced by the new date column
+
+    Examples
+    --------
+    Simple usage.
+
+    >>> df = pd.DataFrame({
+    ...     'start_date': ['2023-01-01', '2023-01-02'],
+    ...     'end_date': ['2023-01-01 01:00', '2023-01-02 02:00'],
+    ... })
+    >>> df_exploded = explode_date_range(df, 'start_date', 'end_date', freq='1h')
+    >>> print(df_exploded)
+                       ts
+    0 2023-01-01 00:00:00
+    1 2023-01-01 01:00:00
+    2 2023-01-02 00:00:00
+    3 2023-01-02 01:00:00
+    4 2023-01-02 02:00:00
+
+    With offset for start and end date.
+
+    >>> df = pd.DataFrame({
+    ...     'start_date': ['2023-01-01', '2023-01-02'],
+    ...     'end_date': ['2023-01-01 01:00:00', '2023-01-02 02:00:00'],
+    ... })
+    >>> df_exploded = explode_date_range(
+    ...     df=df,
+    ...     start_date_col='start_date',
+    ...     end_date_col='end_date',
+    ...     freq='1h',
+    ...     start_date_offset=pd.DateOffset(hours=1),
+    ...     end_date_offset=pd.DateOffset(hours=-1),
+    ... )
+    >>> print(df_exploded)
+                       ts
+    0 2023-01-02 01:00:00
+
+    With rolling start and end date to the nearest frequency (hour).
+
+    >>> df = pd.DataFrame({
+    ...     'start_date': ['2023-01-01 00:30', '2023-01-02 00:30'],
+    ...     'end_date': ['2023-01-01 01:30', '2023-01-02 02:30'],
+    ... })
+    >>> df_exploded = explode_date_range(
+    ...     df=df,
+    ...     start_date_col='start_date',
+    ...     end_date_col='end_date',
+    ...     freq='1h',
+    ...     start_date_roll='forward',
+    ...     end_date_roll='backward',
+    ... )
+    >>> print(df_exploded)
+                       ts
+    0 2023-01-01 01:00:00
+    1 2023-01-02 01:00:00
+    2 2023-01-02 02:00:00
+    """
+    if not drop_index:
+        df, levels, levels_old = _index_levels(
+            df, start_date_col, end_date_col, date_col, drop_date_cols
+        )
+        df, index = _split_index(df, start_date_col, end_date_col)
+
+    df, inclusive, inclusive_par = _prepare_date_range(
+        df.reset_index(drop=True),
+        start_date_col,
+        end_date_col,
+        freq,
+        start_date_offset,
+        end_date_offset,
+        start_date_roll,
+        end_date_roll,
+        min_date,
+        max_date,
+        inclusive,
+        freq_col,
+    )
+
+    # also reset index to ensure index start from 0 and is consecutive
+    valid = _valid_date_range(df, start_date_col, end_date_col, inclusive)
+    df = df[valid].reset_index(drop=True)
+    if not drop_index:
+        index = index[valid.to_numpy()]
+
+    explode_args = (
+        df,
+        start_date_col,
+        end_date_col,
+        date_col,
+        freq,
+        inclusive,
+        inclusive_par,
+        drop_date_cols,
+        engine,
+        apportion_cols,
+        apportion_method,
+        encode_strings,
+        dtype_backend,
+        interval_epoch,
+    )
+    if n_jobs is None:
+        df = _explode_rows(*explode_args, freq_col)
+    else:
+        df = _explode_rows_parallel(*explode_args, freq_col, n_jobs)
+
+    # set index
+    if drop_index:
+        df = df.reset_index(drop=True)
+    else:
+        df = _set_exploded_index(df, index, levels, levels_old)
+
+    return df
+
+
+def collapse_date_range(
+    df: pd.DataFrame,
+    start_date_col: str,
+    end_date_col: str,
+    date_col: str = 'ts',
+    freq: str = '30min',
+    by: list[str] = None,
+    inclusive: Literal['both', 'left'] = 'both',
+    sort: bool = True,
+) -> pd.DataFrame:
+    """
+    Collapse DataFrame date column to start/end date columns.
+
+    This is the inverse of `explode_date_range`. Consecutive dates with the
+    same values in the by columns are collapsed to one row, a new row starts
+    where a by column changes or the date is not the previous date plus freq.
+
+    Parameters
+    ----------
+    df:
+        The input DataFrame with the date column.
+    start_date_col:
+        The column name in the new DataFrame for the start date.
+    end_date_col:
+        The column name in the new DataFrame for the end date.
+    date_col:
+        The column name in the DataFrame for the date.
+    freq:
+        The frequency of the date column.
+    by:
+        The columns that must be the same in a date range.
+        All columns except the date column are used if None.
+    inclusive:
+        Whether the end date is the last date ('both')
+        or the last date plus freq ('left').
+    sort:
+        Whether to sort the DataFrame by the by columns and the date column.
+        If False, the DataFrame must be sorted already.
+
+    Returns
+    -------
+    pd.DataFrame
+        The DataFrame with the by columns and start/end date columns
+
+    Examples
+    --------
+    >>> df = pd.DataFrame({
+    ...     'asset': ['a', 'a', 'a', 'a', 'b'],
+    ...     'status': ['on', 'on', 'off', 'on', 'on'],
+    ...     'ts': pd.to_datetime([
+    ...         '2023-01-01 00:00', '2023-01-01 00:30', '2023-01-01 01:00',
+    ...         '2023-01-01 02:00', '2023-01-01 00:00',
+    ...     ]),
+    ... })
+    >>> df_collapsed = collapse_date_range(df, 'start_date', 'end_date', sort=False)
+    >>> print(df_collapsed)
+      asset status          start_date            end_date
+    0     a     on 2023-01-01 00:00:00 2023-01-01 00:30:00
+    1     a    off 2023-01-01 01:00:00 2023-01-01 01:00:00
+    2     a     on 2023-01-01 02:00:00 2023-01-01 02:00:00
+    3     b     on 2023-01-01 00:00:00 2023-01-01 00:00:00
+    """
+    if by is None:
+        by = [col for col in df.columns if col != date_col]
+    if sort:
+        df = df.sort_values([*by, date_col], kind='stable')
+
+    # a new date range starts where a key changes or a date is missing
+    tz = getattr(df[date_col].dtype, 'tz', None)
+    dates = _date_values(df[date_col])
+    new_range = np.ones(len(df), dtype='bool')
+    next_dates = _offset_dates(dates[:-1], freq, tz)
+    new_range[1:] = dates[1:].view('int64') != next_dates
+    if by:
+        keys = df.groupby(by, sort=False, dropna=False).ngroup().to_numpy()
+        new_range[1:] |= keys[1:] != keys[:-1]
+
+    first = np.flatnonzero(new_range)
+    last = np.append(first[1:], len(df))[: len(first)] - 1
+    end_dates = dates[last]
+    if inclusive == 'left':
+        end_dates = _offset_dates(end_dates, freq, tz).view('datetime64[ns]')
+    if tz is not None:
+        start_dates = _utc_to_tz(dates[first], tz).array
+        end_dates = _utc_to_tz(end_dates, tz).array
+    else:
+        start_dates = dates[first]
+
+    df = df[by].iloc[first].reset_index(drop=True)
+    df[start_date_col] = start_dates
+    df[end_date_col] = end_dates
+    return df
+
+
+def explode_date_range_counts(
+    df: pd.DataFrame,
+    start_date_col: str,
+    end_date_col: str,
+    freq: str = '30min',
+    start_date_offset: pd.DateOffset = None,
+    end_date_offset: pd.DateOffset = None,
+    start_date_roll: Literal['backward', 'forward'] | None = None,
+    end_date_roll: Literal['backward', 'forward'] | None = None,
+    min_date: str | pd.Timestamp = None,
+    max_date: str | pd.Timestamp = None,
+    inclusive: Literal['both', 'left', 'right', 'neither'] = 'both',
+    freq_col: str = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get the number of exploded rows of each row without exploding the DataFrame.
+
+    The start/end dates are offset, rolled and limited the same way as
+    `explode_date_range`, only the slot counts are calculated.
+
+    Parameters
+    ----------
+    df:
+        The input DataFrame with start/end date columns/index levels.
+
+    The other parameters are the same as `explode_date_range`.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The number of exploded rows of each input row (0 for invalid rows) and
+        the cumulative offsets with one more element, starting from 0.
+        The exploded rows of input row i are from offsets[i] to offsets[i + 1].
+
+    Examples
+    --------
+    >>> df = pd.DataFrame({
+    ...     'start_date': ['2023-01-01 00:00', '2023-01-02 00:00', None],
+    ...     'end_date': ['2023-01-01 01:00', '2023-01-02 02:00', '2023-01-02 02:00'],
+    ... })
+    >>> counts, offsets = explode_date_range_counts(
+    ...     df, 'start_date', 'end_date', freq='1h'
+    ... )
+    >>> counts
+    array([2, 3, 0])
+    >>> offsets
+    array([0, 2, 5, 5])
+    """
+    if start_date_col not in df.columns or end_date_col not in df.columns:
+        df = df.reset_index()
+    cols = [start_date_col, end_date_col]
+    if freq_col is not None:
+        cols.append(freq_col)
+    df, inclusive, inclusive_par = _prepare_date_range(
+        df[cols].reset_index(drop=True),
+        start_date_col,
+        end_date_col,
+        freq,
+        start_date_offset,
+        end_date_offset,
+        start_date_roll,
+        end_date_roll,
+        min_date,
+        max_date,
+        inclusive,
+        freq_col,
+    )
+    valid = _valid_date_range(df, start_date_col, end_date_col, inclusive).to_numpy()
+
+    counts = np.zeros(len(df), dtype='int64')
+    counts[valid] = _count_rows(
+        df[valid],
+        start_date_col,
+        end_date_col,
+        freq,
+        inclusive,
+        inclusive_par,
+        freq_col,
+    )
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return counts, offsets
+
+
+def iter_explode_date_range(
+    df: pd.DataFrame,
+    start_date_col: str,
+    end_date_col: str,
+    date_col: str = 'ts',
+    freq: str = '30min',
+    start_date_offset: pd.DateOffset = None,
+    end_date_offset: pd.DateOffset = None,
+    start_date_roll: Literal['backward', 'forward'] | None = None,
+    end_date_roll: Literal['backward', 'forward'] | None = None,
+    min_date: str | pd.Timestamp = None,
+    max_date: str | pd.Timestamp = None,
+    inclusive: Literal['both', 'left', 'right', 'neither'] = 'both',
+    drop_index: bool = True,
+    drop_date_cols: bool = True,
+    engine: Literal['vectorized', 'loop'] = 'vectorized',
+    apportion_cols: list[str] = None,
+    apportion_method: Literal['even', 'duration'] = 'even',
+    encode_strings: Literal['category', 'dictionary'] | None = None,
+    dtype_backend: Literal['pyarrow'] | None = None,
+    interval_epoch: str | pd.Timestamp = None,
+    batch_rows: int = 1_000_000,
+    freq_col: str = None,
+) -> Iterator[pd.DataFrame]:
     """
-    Explode DataFrame start/end date columns to date column.
+    Explode DataFrame start/end date columns to date column in batches.
+
+    The input rows are split into batches based on the number of exploded rows
+    of each input row, so each batch has at most batch_rows rows unless
+    a single input row has more. Concatenating the batches gives the same
+    DataFrame as `explode_date_range`.
 
     Parameters
     ----------
-    df:
-        The input DataFrame with start/end date columns/index levels.
-    start_date_col:
-        The column name in the DataFrame for the start date.
-    end_date_col:
-        The column name in the DataFrame for the end date.
-    date_col:
-        The column name in the DataFrame for the new date.
-    freq:
-        The frequency of the new date column.
-    start_date_offset:
-        The date offset for the start date column.
-    end_date_offset:
-        The date offset for the end date column.
-    start_date_roll:
-        Roll the start_date to the start of the current/next period.
-    end_date_roll:
-        Roll the end date to the start of the current/next period.
-    min_date:
-        The min value of the start date after offset.
-    max_date:
-        The max value of the end date after offset.
-    inclusive:
-        Include boundaries; Whether to set each bound as closed or open.
-    drop_index:
-        This flag should be False when the input DataFrame has meaningful index.
-    drop_date_cols:
-        Whether to drop the start_date_col and end_date_col or not.
+    batch_rows:
+        The max number of exploded rows in a batch.
 
-    Returns
-    -------
-    pl.DataFrame
-        The DataFrame same as the input but with
-        start/end date columns replaced by the new date column
+    The other parameters are the same as `explode_date_range`.
+
+    Yields
+    ------
+    pd.DataFrame
+        The exploded DataFrame of a batch of input rows.
 
     Examples
     --------
-    Simple usage.
-
     >>> df = pd.DataFrame({
-    ...     'start_date': ['2023-01-01', '2023-01-02'],
+    ...     'start_date': ['2023-01-01 00:00', '2023-01-02 00:00'],
     ...     'end_date': ['2023-01-01 01:00', '2023-01-02 02:00'],
     ... })
-    >>> df_exploded = explode_date_range(df, 'start_date', 'end_date', freq='1h')
-    >>> print(df_exploded)
+    >>> for df_exploded in iter_explode_date_range(
+    ...     df, 'start_date', 'end_date', freq='1h', batch_rows=3
+    ... ):
+    ...     print(df_exploded)
                        ts
     0 2023-01-01 00:00:00
     1 2023-01-01 01:00:00
+                       ts
     2 2023-01-02 00:00:00
     3 2023-01-02 01:00:00
     4 2023-01-02 02:00:00
+    """
+    if not drop_index:
+        df, levels, levels_old = _index_levels(
+            df, start_date_col, end_date_col, date_col, drop_date_cols
+        )
+        df, index = _split_index(df, start_date_col, end_date_col)
 
-    With offset for start and end date.
+    df, inclusive, inclusive_par = _prepare_date_range(
+        df.reset_index(drop=True),
+        start_date_col,
+        end_date_col,
+        freq,
+        start_date_offset,
+        end_date_offset,
+        start_date_roll,
+        end_date_roll,
+        min_date,
+        max_date,
+        inclusive,
+        freq_col,
+    )
+    valid = _valid_date_range(df, start_date_col, end_date_col, inclusive)
+    df = df[valid].reset_index(drop=True)
+    if not drop_index:
+        index = index[valid.to_numpy()]
 
-    >>> df = pd.DataFrame({
-    ...     'start_date': ['2023-01-01', '2023-01-02'],
-    ...     'end_date': ['2023-01-01 01:00:00', '2023-01-02 02:00:00'],
-    ... })
-    >>> df_exploded = explode_date_range(
-    ...     df=df,
-    ...     start_date_col='start_date',
-    ...     end_date_col='end_date',
-    ...     freq='1h',
-    ...     start_date_offset=pd.DateOffset(hours=1),
-    ...     end_date_offset=pd.DateOffset(hours=-1),
-    ... )
-    >>> print(df_exploded)
-                       ts
-    0 2023-01-02 01:00:00
+    # split input rows on the cumulative exploded row counts
+    counts = _count_rows(
+        df, start_date_col, end_date_col, freq, inclusive, inclusive_par, freq_col
+    )
+    bounds = _batch_bounds(counts, batch_rows)
 
-    With rolling start and end date to the nearest frequency (hour).
+    nrow = 0
+    for i, j in zip(bounds[:-1], bounds[1:]):
+        dfi = _explode_rows(
+            df.iloc[i:j],
+            start_date_col,
+            end_date_col,
+            date_col,
+            freq,
+            inclusive,
+            inclusive_par,
+            drop_date_cols,
+            engine,
+            apportion_cols,
+            apportion_method,
+            encode_strings,
+            dtype_backend,
+            interval_epoch,
+            freq_col,
+        )
+        if drop_index:
+            dfi.index = pd.RangeIndex(nrow, nrow + len(dfi))
+            nrow += len(dfi)
+        else:
+            dfi = _set_exploded_index(dfi, index, levels, levels_old)
+        yield dfi
+
+
+def interval_timeline_sum(
+    df: pd.DataFrame,
+    start_date_col: str,
+    end_date_col: str,
+    value_cols: list[str],
+    date_col: str = 'ts',
+    freq: str = '30min',
+    by: list[str] = None,
+    start_date_offset: pd.DateOffset = None,
+    end_date_offset: pd.DateOffset = None,
+    start_date_roll: Literal['backward', 'forward'] | None = None,
+    end_date_roll: Literal['backward', 'forward'] | None = None,
+    min_date: str | pd.Timestamp = None,
+    max_date: str | pd.Timestamp = None,
+    inclusive: Literal['both', 'left', 'right', 'neither'] = 'both',
+) -> pd.DataFrame:
+    """
+    Sum the values of start/end date ranges for each date without exploding.
+
+    The result is the same as `explode_date_range` followed by a sum of the value
+    columns grouped by the by columns and the date column. Each row is mapped to
+    a slice of a shared date grid, +value/-value are scattered to the first/after
+    the last slot of the slice and a cumulative sum gives the total of each slot.
+    The cost is O(rows + slots) instead of O(rows x slots) for fixed and calendar
+    frequencies, other frequencies are exploded row by row. Only the dates
+    covered by at least one row are returned, NaN values are treated as zero.
+
+    Parameters
+    ----------
+    df:
+        The input DataFrame with start/end date columns/index levels.
+    value_cols:
+        The numeric columns to sum for each date.
+    by:
+        The columns to group the sums by, in addition to the date column.
+
+    The other parameters are the same as `explode_date_range`.
 
+    Returns
+    -------
+    pd.DataFrame
+        The DataFrame with the by columns, the date column and the value columns,
+        sorted by the by columns and the date column
+
+    Examples
+    --------
     >>> df = pd.DataFrame({
-    ...     'start_date': ['2023-01-01 00:30', '2023-01-02 00:30'],
-    ...     'end_date': ['2023-01-01 01:30', '2023-01-02 02:30'],
+    ...     'start_date': ['2023-01-01 00:00', '2023-01-01 01:00'],
+    ...     'end_date': ['2023-01-01 02:00', '2023-01-01 03:00'],
+    ...     'capacity': [10, 5],
     ... })
-    >>> df_exploded = explode_date_range(
-    ...     df=df,
-    ...     start_date_col='start_date',
-    ...     end_date_col='end_date',
-    ...     freq='1h',
-    ...     start_date_roll='forward',
-    ...     end_date_roll='backward',
+    >>> df_sum = interval_timeline_sum(
+    ...     df, 'start_date', 'end_date', ['capacity'], freq='1h', inclusive='left'
     ... )
-    >>> print(df_exploded)
-                       ts
-    0 2023-01-01 01:00:00
-    1 2023-01-02 01:00:00
-    2 2023-01-02 02:00:00
+    >>> print(df_sum)
+                       ts  capacity
+    0 2023-01-01 00:00:00        10
+    1 2023-01-01 01:00:00        15
+    2 2023-01-01 02:00:00         5
     """
-    if not drop_index:
-        levels_old = list(df.index.names)
-        index_names = [
-            f'_idx{i}' if name is None else name for i, name in enumerate(levels_old)
-        ]
-        df = df.rename_axis(index_names, axis=0)
-        if start_date_col in df.columns and end_date_col in df.columns:
-            levels = index_names
-        else:
-            if drop_date_cols:
-                levels = [
-                    level
-                    for level in index_names
-                    if level not in (start_date_col, end_date_col)
-                ]
-                levels_old = [
-                    level
-                    for level in levels_old
-                    if level not in (start_date_col, end_date_col)
-                ]
-            else:
-                levels = index_names
-                # move start/end_date_col to index if one exists
-                if start_date_col in df.columns:
-                    levels += [start_date_col]
-                    levels_old += [start_date_col]
-                elif end_date_col in df.columns:
-                    levels += [end_date_col]
-                    levels_old += [end_date_col]
-            levels += [date_col]
-            levels_old += [date_col]
-
-    df = df.reset_index(drop=drop_index).astype(
-        {
-            start_date_col: 'datetime64[ns]',
-            end_date_col: 'datetime64[ns]',
-        }
+    by = [] if by is None else list(by)
+    if start_date_col not in df.columns or end_date_col not in df.columns:
+        df = df.reset_index()
+    df, inclusive, inclusive_par = _prepare_date_range(
+        df[[*by, *value_cols, start_date_col, end_date_col]].reset_index(drop=True),
+        start_date_col,
+        end_date_col,
+        freq,
+        start_date_offset,
+        end_date_offset,
+        start_date_roll,
+        end_date_roll,
+        min_date,
+        max_date,
+        inclusive,
     )
+    valid = _valid_date_range(df, start_date_col, end_date_col, inclusive)
+    df = df[valid].reset_index(drop=True)
 
-    # offset start date
-    if start_date_offset is not None:
-        df[start_date_col] += start_date_offset
+    # get the slot ranges of rows on the shared date grid
+    tz = getattr(df[start_date_col].dtype, 'tz', None)
+    grid, lo, counts, pos = _timeline_slots(
+        _date_values(df[start_date_col]),
+        _date_values(df[end_date_col]),
+        freq,
+        inclusive,
+        inclusive_par,
+        tz,
+    )
+    nonempty = counts > 0
+    lo, counts, pos = lo[nonempty], counts[nonempty], pos[nonempty]
 
-    # roll start date
-    if start_date_roll is not None:
-        roll_freq = freq if freq[-1] != 'S' else freq[:-1]
-        extra_period = 0 if start_date_roll == 'backward' else 1
-        df[start_date_col] = (
-            df[start_date_col].dt.to_period(roll_freq) + extra_period
-        ).dt.start_time
+    # events at the first/after the last slot of each range, keyed by group
+    if by:
+        codes = df.groupby(by, sort=True, dropna=False).ngroup().to_numpy()
+    else:
+        codes = np.zeros(len(df), dtype='int64')
+    width = len(grid) + 1
+    starts = codes[pos] * width + lo
+    events, inv = np.unique(
+        np.concatenate([starts, starts + counts]), return_inverse=True
+    )
+    n = len(pos)
 
-    # limit start_date and replace null with min_date
-    if min_date is not None:
-        min_date = pd.to_datetime(min_date, dayfirst=True)
-        df[start_date_col] = (
-            df[start_date_col]
-            .fillna(min_date)
-            .where(df[start_date_col] > min_date, min_date)
-        )
+    def cumsum_events(values: np.ndarray) -> np.ndarray:
+        dtype = 'int64' if values.dtype.kind in 'biu' else 'float64'
+        deltas = np.zeros(len(events), dtype=dtype)
+        np.add.at(deltas, inv[:n], values)
+        np.subtract.at(deltas, inv[n:], values)
+        return np.cumsum(deltas)
 
-    # offset end date
-    if end_date_offset is not None:
-        df[end_date_col] += end_date_offset
+    # the slots between two events have the cumulative sum of the first event
+    active = cumsum_events(np.ones(n, dtype='int64'))
+    segments = np.flatnonzero(active[:-1] > 0)
+    seg_pos, offset = _repeat_counts(events[segments + 1] - events[segments])
+    group, slot = np.divmod(events[segments][seg_pos] + offset, width)
+    order = np.lexsort((grid[slot], group))
+    group, slot, seg_pos = group[order], slot[order], seg_pos[order]
 
-    # roll end date
-    if end_date_roll is not None:
-        roll_freq = freq if freq[-1] != 'S' else freq[:-1]
-        extra_period = 0 if end_date_roll == 'backward' else 1
-        df[end_date_col] = (
-            df[end_date_col].dt.to_period(roll_freq) + extra_period
-        ).dt.start_time
+    first = np.unique(codes, return_index=True)[1]
+    df_sum = df[by].iloc[first[group]].reset_index(drop=True)
+    dates = grid[slot].view('datetime64[ns]')
+    df_sum[date_col] = dates if tz is None else _utc_to_tz(dates, tz).array
+    for col in value_cols:
+        values = df[col].fillna(0).to_numpy()[pos]
+        df_sum[col] = cumsum_events(values)[segments][seg_pos]
+    return df_sum
 
-    # limit end_date and replace null with max_date
-    if max_date is not None:
-        max_date = pd.to_datetime(max_date, dayfirst=True)
-        df[end_date_col] = (
-            df[end_date_col]
-            .fillna(max_date)
-            .where(df[end_date_col] < max_date, max_date)
+
+def apply_profile(
+    df: pd.DataFrame,
+    profile: np.ndarray | list[float] | pd.Series,
+    value_cols: list[str] = None,
+    date_col: str = 'ts',
+    freq: str = '30min',
+    profile_col: str = 'profile',
+) -> pd.DataFrame:
+    """
+    Multiply the values of each date by the value of its slot in a daily/weekly profile.
+
+    The slot number of each date is calculated with int64 arithmetic, the number
+    of slot widths since a Monday midnight modulo the number of slots, and is used
+    to index the profile directly instead of merging on the time of day.
+    Tz-aware dates use their local time and null dates get a NaN profile value.
+
+    Parameters
+    ----------
+    df:
+        The input DataFrame with the date column, e.g. from `explode_date_range`.
+    profile:
+        The profile values, slot 0 starts at midnight (or Monday midnight if
+        the profile is longer than a day).
+    value_cols:
+        The columns to multiply by the profile values.
+        The profile values are added as profile_col if None.
+    date_col:
+        The column name in the DataFrame for the date.
+    freq:
+        The fixed width of a profile slot, the profile covers len(profile) slots.
+    profile_col:
+        The column name for the profile values if value_cols is None.
+
+    Returns
+    -------
+    pd.DataFrame
+        The DataFrame with the value columns multiplied by the profile values
+
+    Examples
+    --------
+    >>> df = pd.DataFrame({
+    ...     'ts': pd.to_datetime([
+    ...         '2023-01-01 00:00', '2023-01-01 12:00', '2023-01-02 18:00',
+    ...     ]),
+    ...     'load': [10.0, 10.0, 20.0],
+    ... })
+    >>> print(apply_profile(df, [0.5, 1.0, 1.5, 2.0], ['load'], freq='6h'))
+                       ts  load
+    0 2023-01-01 00:00:00   5.0
+    1 2023-01-01 12:00:00  15.0
+    2 2023-01-02 18:00:00  40.0
+    """
+    # imported here as the parquet module imports this module
+    from .parquet import pa_mod
+
+    step = _fixed_freq_nanos(freq)
+    profile = np.asarray(profile)
+    if len(profile) == 0:
+        raise ValueError('The profile must have at least one value')
+    if step is None or (7 * _DAY_NANOS) % (step * len(profile)) != 0:
+        raise ValueError(
+            'The profile slots must cover a day, a week or a period dividing a week'
         )
 
-    # FIXME: special regarding pandas version
-    pd_version = tuple(int(n) for n in pd.__version__.split('.')[:3])
-    if pd_version >= (1, 4, 0):
-        inclusive_par = {'inclusive': inclusive}
+    # slot 0 of a weekly profile starts on Monday 1970-01-05 (also a midnight)
+    dates = df[date_col]
+    if isinstance(dates.dtype, pd.DatetimeTZDtype):
+        dates = dates.dt.tz_localize(None)
+    origin = pd.Timestamp('1970-01-05').value
+    values = dates.to_numpy().astype('datetime64[ns]').view('int64')
+    slots = pa_mod((values - origin) // step, len(profile))
+    factors = profile[slots]
+    isna = dates.isna().to_numpy()
+    if isna.any():
+        # NaT is int64 min, so its slot is a real slot
+        factors = np.where(isna, np.nan, factors)
+
+    df = df.copy()
+    if value_cols is None:
+        df[profile_col] = factors
     else:
-        if inclusive == 'neither':
-            inclusive = 'right'
-            df[end_date_col] -= pd.DateOffset(microseconds=1)
-        inclusive_par = {'closed': None if inclusive == 'both' else inclusive}
+        df[value_cols] = df[value_cols].mul(factors, axis=0)
+    return df
 
-    # if inclusive = 'left' we expect date_end is exclusive
-    #   so records with start_date == end_date should be excluded
-    # also reset index to ensure index start from 0 and is consecutive
-    if inclusive == 'left':
-        df = df.query(f'{start_date_col} < {end_date_col}').reset_index(drop=True)
+
+def _start_range_pairs(
+    keys: np.ndarray, low: np.ndarray, high: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get the pairs of query rows and rows with a key in the query range [low, high).
+
+    Returns the positions of the query rows and of the rows.
+    """
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    lo, hi = np.searchsorted(keys, low), np.searchsorted(keys, high)
+    pos, slot = _repeat_counts(np.clip(hi - lo, 0, None))
+    return pos, order[lo[pos] + slot]
+
+
+def interval_overlap_join(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    start_date_col: str,
+    end_date_col: str,
+    on: list[str] = None,
+    inclusive: Literal['both', 'left'] = 'both',
+    suffixes: tuple[str, str] = ('_left', '_right'),
+) -> pd.DataFrame:
+    """
+    Join the rows of two DataFrames with overlapping start/end date ranges.
+
+    The date ranges are not exploded. The right rows starting in a left date range
+    and the left rows starting after the start date in a right date range are found
+    with a binary search on the rows sorted by the on columns and the start date,
+    so the time is proportional to the sorting and the number of joined rows.
+
+    Parameters
+    ----------
+    left:
+        The left DataFrame with start/end date columns.
+    right:
+        The right DataFrame with start/end date columns.
+    start_date_col:
+        The column name in the DataFrames for the start date.
+    end_date_col:
+        The column name in the DataFrames for the end date.
+    on:
+        The columns that must be equal in the joined rows.
+    inclusive:
+        Whether the end dates are inclusive ('both') or exclusive ('left'),
+        date ranges with exclusive end dates must overlap by more than a date.
+    suffixes:
+        The suffixes of the other columns in both DataFrames.
+
+    Returns
+    -------
+    pd.DataFrame
+        The joined rows with the left columns, the right columns and the start/end
+        date columns of the intersection of the date ranges, ordered by the left
+        rows then the right start dates
+
+    Examples
+    --------
+    >>> contracts = pd.DataFrame({
+    ...     'site': ['a', 'a', 'b'],
+    ...     'start_date': pd.to_datetime(['2023-01-01', '2023-02-01', '2023-01-01']),
+    ...     'end_date': pd.to_datetime(['2023-02-01', '2023-03-01', '2023-03-01']),
+    ... })
+    >>> outages = pd.DataFrame({
+    ...     'site': ['a', 'b'],
+    ...     'start_date': pd.to_datetime(['2023-01-20', '2023-03-01']),
+    ...     'end_date': pd.to_datetime(['2023-02-10', '2023-03-05']),
+    ... })
+    >>> df = interval_overlap_join(
+    ...     contracts, outages, 'start_date', 'end_date', on=['site'], inclusive='left'
+    ... )
+    >>> print(df)
+      site start_date   end_date
+    0    a 2023-01-20 2023-02-01
+    1    a 2023-02-01 2023-02-10
+    """
+    on = [] if on is None else list(on)
+    left = left[_valid_date_range(left, start_date_col, end_date_col, inclusive)]
+    right = right[_valid_date_range(right, start_date_col, end_date_col, inclusive)]
+    left, right = left.reset_index(drop=True), right.reset_index(drop=True)
+    tz = getattr(left[start_date_col].dtype, 'tz', None)
+    lstart, lend, rstart, rend = (
+        _date_values(df[col]).astype('datetime64[ns]').view('int64')
+        for df in (left, right)
+        for col in (start_date_col, end_date_col)
+    )
+
+    # group codes of the on columns shared by both sides
+    if on:
+        keys = pd.concat([left[on], right[on]], ignore_index=True)
+        codes = keys.groupby(on, sort=False, dropna=False).ngroup().to_numpy()
     else:
-        df = df.query(f'{start_date_col} <= {end_date_col}').reset_index(drop=True)
-
-    # get exploded timestamp column
-    if df.empty:
-        dt = (
-            pd.DataFrame(
-                {
-                    'i': pd.Series(dtype='int'),
-                    date_col: pd.Series(dtype='datetime64[ns]'),
-                }
-            )
-            .set_index('i')
-            .rename_axis(None, axis=0)
+        codes = np.zeros(len(left) + len(right), dtype='int64')
+    left_codes, right_codes = codes[: len(left)], codes[len(left) :]
+
+    # an overlapping right row starts in the left date range or the left row
+    # starts after the right start date in the right date range, so both sets of
+    # pairs are ranges of the rows sorted by the group code and the start date
+    times = np.unique(np.concatenate([lstart, rstart]))
+    width = len(times) + 1
+    side = 'right' if inclusive == 'both' else 'left'
+    pos, right_pos = _start_range_pairs(
+        right_codes * width + np.searchsorted(times, rstart),
+        left_codes * width + np.searchsorted(times, lstart),
+        left_codes * width + np.searchsorted(times, lend, side=side),
+    )
+    inner_right_pos, inner_pos = _start_range_pairs(
+        left_codes * width + np.searchsorted(times, lstart),
+        right_codes * width + np.searchsorted(times, rstart, side='right'),
+        right_codes * width + np.searchsorted(times, rend, side=side),
+    )
+    pos = np.concatenate([pos, inner_pos])
+    right_pos = np.concatenate([right_pos, inner_right_pos])
+    order = np.lexsort((right_pos, rstart[right_pos], pos))
+    pos, right_pos = pos[order], right_pos[order]
+
+    # combine both sides with the intersection of the date ranges
+    date_cols = [start_date_col, end_date_col]
+    df_left = left.drop(columns=date_cols).take(pos).reset_index(drop=True)
+    df_right = right.drop(columns=date_cols + on).take(right_pos)
+    common = df_left.columns.intersection(df_right.columns).difference(on)
+    df_left = df_left.rename(columns={col: col + suffixes[0] for col in common})
+    df_right = df_right.rename(columns={col: col + suffixes[1] for col in common})
+    df = pd.concat([df_left, df_right.reset_index(drop=True)], axis=1)
+    starts = np.maximum(lstart[pos], rstart[right_pos]).view('datetime64[ns]')
+    ends = np.minimum(lend[pos], rend[right_pos]).view('datetime64[ns]')
+    df[start_date_col] = starts if tz is None else _utc_to_tz(starts, tz).array
+    df[end_date_col] = ends if tz is None else _utc_to_tz(ends, tz).array
+    return df
+
+
+class ExplodedView:
+    """
+    A lazy view of the exploded rows of a DataFrame with start/end date columns.
+
+    Only the prepared input rows and the cumulative exploded row counts are kept,
+    so the memory is proportional to the input DataFrame. The exploded rows are
+    positional (like `explode_date_range` with drop_index=True) and a window of
+    rows is exploded on access, the input rows of the window are found with a
+    binary search on the cumulative counts.
+
+    Parameters
+    ----------
+    df:
+        The input DataFrame with start/end date columns.
+
+    The other parameters are the same as `explode_date_range`.
+
+    Examples
+    --------
+    >>> df = pd.DataFrame({
+    ...     'start_date': ['2023-01-01 00:00', '2023-01-02 00:00'],
+    ...     'end_date': ['2023-01-01 01:00', '2023-01-02 02:00'],
+    ... })
+    >>> view = ExplodedView(df, 'start_date', 'end_date', freq='1h')
+    >>> len(view)
+    5
+    >>> print(view[1:4])
+                       ts
+    1 2023-01-01 01:00:00
+    2 2023-01-02 00:00:00
+    3 2023-01-02 01:00:00
+    >>> view[-1]['ts']
+    Timestamp('2023-01-02 02:00:00')
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        start_date_col: str,
+        end_date_col: str,
+        date_col: str = 'ts',
+        freq: str = '30min',
+        start_date_offset: pd.DateOffset = None,
+        end_date_offset: pd.DateOffset = None,
+        start_date_roll: Literal['backward', 'forward'] | None = None,
+        end_date_roll: Literal['backward', 'forward'] | None = None,
+        min_date: str | pd.Timestamp = None,
+        max_date: str | pd.Timestamp = None,
+        inclusive: Literal['both', 'left', 'right', 'neither'] = 'both',
+        drop_date_cols: bool = True,
+        engine: Literal['vectorized', 'loop'] = 'vectorized',
+        apportion_cols: list[str] = None,
+        apportion_method: Literal['even', 'duration'] = 'even',
+        encode_strings: Literal['category', 'dictionary'] | None = None,
+        dtype_backend: Literal['pyarrow'] | None = None,
+        interval_epoch: str | pd.Timestamp = None,
+        freq_col: str = None,
+    ):
+        df, inclusive, inclusive_par = _prepare_date_range(
+            df.reset_index(drop=True),
+            start_date_col,
+            end_date_col,
+            freq,
+            start_date_offset,
+            end_date_offset,
+            start_date_roll,
+            end_date_roll,
+            min_date,
+            max_date,
+            inclusive,
+            freq_col,
         )
-    else:
-        dt = (
-            pd.concat(
-                [
-                    pd.DataFrame(
-                        {
-                            'i': i,
-                            date_col: pd.date_range(
-                                start=s, end=e, freq=freq, **inclusive_par
-                            ),
-                        }
-                    )
-                    for i, (s, e) in enumerate(
-                        zip(df[start_date_col], df[end_date_col])
-                    )
-                ]
-            )
-            .set_index('i')
-            .rename_axis(None, axis=0)
+        valid = _valid_date_range(df, start_date_col, end_date_col, inclusive)
+        self._df = df[valid].reset_index(drop=True)
+        self._explode_par = {
+            'start_date_col': start_date_col,
+            'end_date_col': end_date_col,
+            'date_col': date_col,
+            'freq': freq,
+            'inclusive': inclusive,
+            'inclusive_par': inclusive_par,
+            'drop_date_cols': drop_date_cols,
+            'engine': engine,
+            'apportion_cols': apportion_cols,
+            'apportion_method': apportion_method,
+            'encode_strings': encode_strings,
+            'dtype_backend': dtype_backend,
+            'interval_epoch': interval_epoch,
+            'freq_col': freq_col,
+        }
+        self.counts = _count_rows(
+            self._df,
+            start_date_col,
+            end_date_col,
+            freq,
+            inclusive,
+            inclusive_par,
+            freq_col,
         )
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)])
 
-    # drop start_date_col and end_date_col
-    if drop_date_cols:
-        df = df.drop(columns=[start_date_col, end_date_col])
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
 
-    # sample df based on new timestamp column
-    df = df.reindex(dt.index)
-    df[date_col] = dt[date_col]
+    def __repr__(self) -> str:
+        return f'ExplodedView(rows={len(self._df)}, exploded_rows={len(self)})'
 
-    # set index
-    if drop_index:
-        df = df.reset_index(drop=True)
-    else:
-        df = df.set_index(levels).rename_axis(levels_old, axis=0)
+    def __getitem__(self, key: int | slice) -> pd.Series | pd.DataFrame:
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                raise ValueError('ExplodedView only supports slices with step 1')
+            return self.to_pandas(key.start, key.stop)
+        i = range(len(self))[key]
+        return self.to_pandas(i, i + 1).iloc[0]
 
-    return df
+    def to_pandas(self, start: int = None, stop: int = None) -> pd.DataFrame:
+        """
+        Explode a window of rows.
+
+        Parameters
+        ----------
+        start:
+            The position of the first exploded row, like a slice start.
+        stop:
+            The position after the last exploded row, like a slice stop.
+
+        Returns
+        -------
+        pd.DataFrame
+            The exploded rows from start to stop, indexed by their positions
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        i = np.searchsorted(self.offsets, start, side='right') - 1
+        j = max(np.searchsorted(self.offsets, stop, side='left'), i)
+        df = _explode_rows(self._df.iloc[i:j], **self._explode_par)
+        skip = start - self.offsets[i]
+        df = df.iloc[skip : skip + stop - start]
+        df.index = pd.RangeIndex(start, stop)
+        return df
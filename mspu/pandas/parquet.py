@@ -1,4 +1,14 @@
+import numpy as np
 import pandas as pd
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+from .datetime import explode_date_range, iter_explode_date_range
+from .utils import df_diffs
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
 
 
 def pa_mod(
@@ -34,3 +44,346 @@ def pa_mod(
         remainder = ds - (quotient * divisor)
 
     return remainder
+
+
+def _writer_schema(schema: 'pa.Schema', df: pd.DataFrame) -> 'pa.Schema':
+    """
+    Set the null type columns of a batch schema to the types in the input DataFrame.
+
+    An object column with only nulls in the first batch has the null type, so the
+    types of the whole input columns/index levels are used for the other batches.
+    """
+    import pyarrow as pa
+
+    for i, field in enumerate(schema):
+        if not pa.types.is_null(field.type):
+            continue
+        if field.name in df.columns:
+            values = df[field.name]
+        elif field.name in df.index.names:
+            values = df.index.get_level_values(field.name)
+        else:
+            continue
+        value_type = pa.array(values, from_pandas=True).type
+        schema = schema.set(i, field.with_type(value_type))
+    return schema
+
+
+def explode_date_range_to_parquet(
+    df: pd.DataFrame,
+    path: str,
+    start_date_col: str,
+    end_date_col: str,
+    batch_rows: int = 1_000_000,
+    compression: str = 'snappy',
+    **kwargs,
+) -> int:
+    """
+    Explode DataFrame start/end date columns and write the result to a parquet file.
+
+    The DataFrame is exploded in batches by `iter_explode_date_range` and each
+    batch is written as a row group by `pyarrow.parquet.ParquetWriter`, so the
+    memory usage is bounded by the batch size instead of the output size.
+
+    Parameters
+    ----------
+    df:
+        The input DataFrame with start/end date columns/index levels.
+    path:
+        The path of the output parquet file.
+    start_date_col:
+        The column name in the DataFrame for the start date.
+    end_date_col:
+        The column name in the DataFrame for the end date.
+    batch_rows:
+        The max number of exploded rows in a batch (row group).
+    compression:
+        The compression codec of the parquet file.
+    **kwargs:
+        Other parameters passed to `iter_explode_date_range`.
+
+    Returns
+    -------
+    int
+        The number of rows written to the parquet file.
+
+    Examples
+    --------
+    >>> df = pd.DataFrame({
+    ...     'start_date': ['2023-01-01 00:00', '2023-01-02 00:00'],
+    ...     'end_date': ['2023-01-01 01:00', '2023-01-02 02:00'],
+    ... })
+    >>> explode_date_range_to_parquet(
+    ...     df, 'exploded.parquet', 'start_date', 'end_date', freq='1h'
+    ... )
+    5
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    preserve_index = not kwargs.get('drop_index', True)
+    batches = iter_explode_date_range(
+        df, start_date_col, end_date_col, batch_rows=batch_rows, **kwargs
+    )
+    nrow = 0
+    writer = None
+    try:
+        for batch in batches:
+            if writer is None:
+                table = pa.Table.from_pandas(batch, preserve_index=preserve_index)
+                schema = _writer_schema(table.schema, df)
+                table = table.cast(schema)
+                writer = pq.ParquetWriter(path, schema, compression=compression)
+            else:
+                table = pa.Table.from_pandas(
+                    batch, schema=writer.schema, preserve_index=preserve_index
+                )
+            writer.write_table(table)
+            nrow += len(batch)
+        # write an empty file with the exploded schema
+        if writer is None:
+            batch = explode_date_range(df, start_date_col, end_date_col, **kwargs)
+            table = pa.Table.from_pandas(batch, preserve_index=preserve_index)
+            pq.write_table(table, path, compression=compression)
+    finally:
+        if writer is not None:
+            writer.close()
+    return nrow
+
+
+def _key_schemas(
+    schemas: list['pa.Schema'],
+    keys: list[str],
+) -> list['pa.Schema']:
+    """
+    Set the key columns of the schemas to the unified key types of all schemas.
+
+    Equal keys of different types (e.g. int32 and int64) have different hashes,
+    so the key columns are cast to the same types before bucketing.
+    """
+    import pyarrow as pa
+
+    key_schema = pa.unify_schemas(
+        [pa.schema([schema.field(key) for key in keys]) for schema in schemas],
+        promote_options='permissive',
+    )
+    for key in keys:
+        schemas = [
+            schema.set(schema.get_field_index(key), key_schema.field(key))
+            for schema in schemas
+        ]
+    return schemas
+
+
+def _key_dtype(pa_type: 'pa.DataType') -> pd.api.extensions.ExtensionDtype | None:
+    """
+    Get the nullable pandas dtype of an integer/boolean key type, None otherwise.
+
+    By default, integer/boolean columns with nulls are converted to float/object,
+    so the hashes of the same keys would depend on the nulls in a batch.
+    """
+    import pyarrow as pa
+
+    if pa.types.is_boolean(pa_type):
+        return pd.BooleanDtype()
+    if pa.types.is_integer(pa_type):
+        return pd.api.types.pandas_dtype(
+            str(pa_type).replace('uint', 'UInt').replace('int', 'Int')
+        )
+    return None
+
+
+def _write_buckets(
+    dataset: 'ds.Dataset',
+    schema: 'pa.Schema',
+    keys: list[str],
+    bucket_dir: Path,
+    n_buckets: int,
+    batch_rows: int,
+):
+    """
+    Hash-partition a parquet dataset by the key columns into bucket files.
+
+    The parquet files are read in batches, cast to the schema and the rows of each
+    batch are appended to the file `bucket_dir/{bucket}.parquet` of the bucket of
+    the row keys.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writers = {}
+    try:
+        for file in dataset.files:
+            # without pre-buffering only the row groups of a batch are in memory
+            parquet_file = pq.ParquetFile(
+                file, pre_buffer=False, filesystem=dataset.filesystem
+            )
+            for batch in parquet_file.iter_batches(batch_size=batch_rows):
+                table = pa.Table.from_batches([batch]).cast(schema)
+                key_df = table.select(keys).to_pandas(types_mapper=_key_dtype)
+                buckets = (
+                    pd.util.hash_pandas_object(key_df, index=False).to_numpy()
+                    % n_buckets
+                )
+                # sort the rows by bucket and write each bucket as a slice
+                table = table.take(np.argsort(buckets, kind='stable'))
+                counts = np.bincount(buckets.astype('int64'), minlength=n_buckets)
+                offsets = np.concatenate([[0], np.cumsum(counts)])
+                for bucket in np.flatnonzero(counts):
+                    if bucket not in writers:
+                        writers[bucket] = pq.ParquetWriter(
+                            bucket_dir / f'{bucket}.parquet', schema
+                        )
+                    writers[bucket].write_table(
+                        table.slice(offsets[bucket], counts[bucket])
+                    )
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+def _read_bucket(
+    bucket_dir: Path,
+    bucket: int,
+    schema: 'pa.Schema',
+    keys: list[str],
+) -> pd.DataFrame:
+    """
+    Read a bucket file to a DataFrame indexed by the keys, empty if no file.
+    """
+    import pyarrow.parquet as pq
+
+    path = bucket_dir / f'{bucket}.parquet'
+    table = pq.read_table(path) if path.exists() else schema.empty_table()
+    return table.to_pandas().set_index(keys)
+
+
+def _diffs_schema(
+    columns: pd.Index,
+    schema1: 'pa.Schema',
+    schema2: 'pa.Schema',
+    left_suffix: str,
+    right_suffix: str,
+) -> 'pa.Schema':
+    """
+    Get the schema of the diff columns from the schemas of the two datasets.
+    """
+    import pyarrow as pa
+
+    fields = []
+    for col in columns:
+        if col.endswith(left_suffix) and col[: -len(left_suffix)] in schema1.names:
+            field = schema1.field(col[: -len(left_suffix)])
+        elif col.endswith(right_suffix) and col[: -len(right_suffix)] in schema2.names:
+            field = schema2.field(col[: -len(right_suffix)])
+        elif col in schema1.names:
+            field = schema1.field(col)
+        else:
+            field = schema2.field(col)
+        fields.append(pa.field(col, field.type))
+    return pa.schema(fields)
+
+
+def parquet_diffs(
+    path1: str,
+    path2: str,
+    keys: list[str],
+    output_path: str,
+    n_buckets: int = 64,
+    batch_rows: int = 1_000_000,
+    left_suffix: str = '_df1',
+    right_suffix: str = '_df2',
+    engine: Literal['merge', 'hash', 'sorted', 'auto'] = 'auto',
+    compression: str = 'snappy',
+    tmp_dir: str = None,
+) -> int:
+    """
+    Get rows in two parquet datasets that are different and write them to a file.
+
+    The datasets can be larger than memory. Both datasets are read in batches and
+    hash-partitioned by the key columns into n_buckets bucket files in a temporary
+    directory, so rows with the same keys are in the same bucket of both sides.
+    Each pair of buckets is compared by `df_diffs` and the different rows are
+    appended to the output file, so the memory usage is bounded by the bucket size.
+
+    Parameters
+    ----------
+    path1:
+        The path of the first parquet file or dataset directory.
+    path2:
+        The path of the second parquet file or dataset directory.
+    keys:
+        The key columns to match the rows, they should be unique in each dataset.
+    output_path:
+        The path of the output parquet file.
+    n_buckets:
+        The number of buckets, use more buckets for larger datasets.
+    batch_rows:
+        The max number of rows read from a dataset at a time.
+    left_suffix:
+        Suffix to append to column names from path1 in the output.
+    right_suffix:
+        Suffix to append to column names from path2 in the output.
+    engine:
+        The engine of `df_diffs` to compare the buckets.
+    compression:
+        The compression codec of the parquet file.
+    tmp_dir:
+        The directory for the temporary bucket files, None for the system default.
+
+    Returns
+    -------
+    int
+        The number of rows written to the parquet file.
+
+    Examples
+    --------
+    >>> df1 = pd.DataFrame({'id': [1, 2, 4], 'price': [4, 3.1, 2.5]})
+    >>> df2 = pd.DataFrame({'id': [1, 3, 4], 'price': [4, 3.2, 2.5]})
+    >>> df1.to_parquet('prices1.parquet')
+    >>> df2.to_parquet('prices2.parquet')
+    >>> parquet_diffs('prices1.parquet', 'prices2.parquet', ['id'], 'diffs.parquet')
+    2
+    >>> print(pd.read_parquet('diffs.parquet').sort_values('id'))
+       id  price_df1  price_df2
+    0   2        3.1        NaN
+    1   3        NaN        3.2
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    datasets = [ds.dataset(path, format='parquet') for path in (path1, path2)]
+    schemas = _key_schemas([dataset.schema for dataset in datasets], keys)
+
+    nrow = 0
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        dirs = Path(tmp) / 'df1', Path(tmp) / 'df2'
+        for dataset, schema, bucket_dir in zip(datasets, schemas, dirs):
+            bucket_dir.mkdir()
+            _write_buckets(dataset, schema, keys, bucket_dir, n_buckets, batch_rows)
+
+        # the output columns have the types of the source columns in all buckets
+        columns = (
+            df_diffs(
+                *(s.empty_table().to_pandas().set_index(keys) for s in schemas),
+                left_suffix=left_suffix,
+                right_suffix=right_suffix,
+            )
+            .reset_index()
+            .columns
+        )
+        schema = _diffs_schema(columns, *schemas, left_suffix, right_suffix)
+        with pq.ParquetWriter(output_path, schema, compression=compression) as writer:
+            for bucket in range(n_buckets):
+                diffs = df_diffs(
+                    *(_read_bucket(d, bucket, s, keys) for d, s in zip(dirs, schemas)),
+                    left_suffix=left_suffix,
+                    right_suffix=right_suffix,
+                    engine=engine,
+                ).reset_index()
+                if len(diffs) > 0:
+                    table = pa.Table.from_pandas(diffs, preserve_index=False)
+                    writer.write_table(table.cast(schema))
+                    nrow += len(diffs)
+    return nrow
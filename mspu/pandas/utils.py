@@ -1,4 +1,6 @@
+import numpy as np
 import pandas as pd
+from typing import Literal
 
 
 def pd_ht(self, n: int = 2, c: int = None, w: int = None, r: int = None) -> None:
@@ -83,11 +85,159 @@ def remove_cols_utc(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def _merge_diffs(
+    df1: pd.DataFrame,
+    df2: pd.DataFrame,
+    left_suffix: str,
+    right_suffix: str,
+) -> pd.DataFrame:
+    """
+    Get the different rows with a full outer merge of the two dfs.
+    """
+    # Perform an outer join
+    df_joined = pd.merge(
+        df1,
+        df2,
+        how='outer',
+        left_index=True,
+        right_index=True,
+        suffixes=(left_suffix, right_suffix),
+    )
+
+    # Compare the columns to find differences
+    d1_joined = df_joined.filter(like=left_suffix).rename(
+        columns=lambda x: x.rsplit('_', 1)[0]
+    )
+    d2_joined = df_joined.filter(like=right_suffix).rename(
+        columns=lambda x: x.rsplit('_', 1)[0]
+    )
+
+    # Compare two dfs with `ne`, col names must be the same
+    diffs = df_joined[d1_joined.ne(d2_joined).any(axis=1)]
+
+    return diffs
+
+
+def _hash_diffs(
+    df1: pd.DataFrame,
+    df2: pd.DataFrame,
+    left_suffix: str,
+    right_suffix: str,
+) -> pd.DataFrame:
+    """
+    Get the different rows by comparing one 64-bit hash per row.
+
+    Rows with the same index and row hash are dropped before the merge,
+    except rows with missing values as missing values are never equal.
+    """
+    h1 = pd.util.hash_pandas_object(df1, index=False).to_numpy()
+    h2 = pd.util.hash_pandas_object(df2, index=False).to_numpy()
+
+    # position of each df1 row in df2, -1 if not in df2
+    pos = df2.index.get_indexer(df1.index)
+    matched = pos >= 0
+    same1 = np.zeros(len(df1), dtype=bool)
+    same1[matched] = h1[matched] == h2[pos[matched]]
+    same1 &= df1.notna().all(axis=1).to_numpy()
+    same2 = np.zeros(len(df2), dtype=bool)
+    same2[pos[same1]] = True
+
+    return _merge_diffs(df1[~same1], df2[~same2], left_suffix, right_suffix)
+
+
+def _is_numpy_num(dtype) -> bool:
+    """
+    Check if a dtype is a numpy bool/integer/float dtype.
+    """
+    return isinstance(dtype, np.dtype) and dtype.kind in 'biuf'
+
+
+def _sorted_keys(
+    index1: pd.MultiIndex,
+    index2: pd.MultiIndex,
+) -> tuple[pd.Index, pd.Index] | None:
+    """
+    Encode two sorted MultiIndexes as int64 keys in the same order.
+
+    The codes of each level are mapped to the sorted union of the levels and
+    combined into one key. Returns None if a level has missing values,
+    the levels cannot be sorted or the keys overflow int64.
+    """
+    keys1 = np.zeros(len(index1), dtype='int64')
+    keys2 = np.zeros(len(index2), dtype='int64')
+    size = 1
+    for i in range(index1.nlevels):
+        codes1, codes2 = index1.codes[i], index2.codes[i]
+        if (codes1 < 0).any() or (codes2 < 0).any():
+            return None
+        levels = index1.levels[i].union(index2.levels[i])
+        if not levels.is_monotonic_increasing:
+            return None
+        size *= len(levels)
+        if size >= 2**63:
+            return None
+        keys1 = keys1 * len(levels) + levels.get_indexer(index1.levels[i])[codes1]
+        keys2 = keys2 * len(levels) + levels.get_indexer(index2.levels[i])[codes2]
+    return pd.Index(keys1), pd.Index(keys2)
+
+
+def _sorted_diffs(
+    df1: pd.DataFrame,
+    df2: pd.DataFrame,
+    left_suffix: str,
+    right_suffix: str,
+) -> pd.DataFrame:
+    """
+    Get the different rows of two dfs with sorted unique indexes.
+
+    The keys are classified as left-only, right-only or both with a linear
+    merge join of the sorted indexes, without a hash table of all keys.
+    The rows in both dfs are compared column by column and only the left-only,
+    right-only and different rows are merged.
+    """
+    index1, index2 = df1.index, df2.index
+    if isinstance(index1, pd.MultiIndex):
+        keys = _sorted_keys(index1, index2)
+        if keys is None:
+            return _hash_diffs(df1, df2, left_suffix, right_suffix)
+        index1, index2 = keys
+
+    pos1, pos2 = index1.join(index2, how='outer', return_indexers=True)[1:]
+    if pos1 is None:
+        pos1 = np.arange(len(df1))
+    if pos2 is None:
+        pos2 = np.arange(len(df2))
+    both = (pos1 >= 0) & (pos2 >= 0)
+    pos1, pos2 = pos1[both], pos2[both]
+
+    # compare the rows in both dfs column by column, missing values are different
+    diff = np.zeros(len(pos1), dtype=bool)
+    for col in df1.columns:
+        dtype1, dtype2 = df1[col].dtype, df2[col].dtype
+        if _is_numpy_num(dtype1) and _is_numpy_num(dtype2):
+            # NaN/NaT are not equal to anything with numpy
+            values1 = df1[col].to_numpy()[pos1]
+            values2 = df2[col].to_numpy()[pos2]
+            diff |= ~(values1 == values2)
+        else:
+            values1 = df1[col].take(pos1).reset_index(drop=True)
+            values2 = df2[col].take(pos2).reset_index(drop=True)
+            diff |= (values1.ne(values2) | values1.isna() | values2.isna()).to_numpy()
+
+    same1 = np.zeros(len(df1), dtype=bool)
+    same1[pos1[~diff]] = True
+    same2 = np.zeros(len(df2), dtype=bool)
+    same2[pos2[~diff]] = True
+
+    return _merge_diffs(df1[~same1], df2[~same2], left_suffix, right_suffix)
+
+
 def df_diffs(
     df1: pd.DataFrame,
     df2: pd.DataFrame,
     left_suffix: str = '_df1',
     right_suffix: str = '_df2',
+    engine: Literal['merge', 'hash', 'sorted', 'auto'] = 'merge',
 ) -> pd.DataFrame:
     """
     Get rows in two dfs that are different to each other.
@@ -104,6 +254,17 @@ def df_diffs(
         Suffix to append to column names from df1 in the output DataFrame.
     right_suffix : str
         Suffix to append to column names from df2 in the output DataFrame.
+    engine : str
+        'merge' compares all rows after a full outer merge. 'hash' compares one
+        64-bit hash per row on the aligned index first and only merges the rows
+        that are not in both dfs or have different hashes, which is much faster
+        for large dfs with few differences. 'sorted' is for dfs sorted by unique
+        indexes, the keys are matched with a linear merge join and the matched
+        rows are compared column by column, so no hash table of all keys is built.
+        It uses 'hash' if an index is not monotonic increasing. 'auto' uses
+        'sorted', 'hash' or 'merge', the first one that can be used.
+        'hash' and 'sorted' fall back to 'merge' if an index is not unique
+        or the dfs have different columns.
 
     Returns
     -------
@@ -146,28 +307,20 @@ def df_diffs(
     banana 2         uk        3.1       NaN        NaN
            3        NaN        NaN        uk        3.2
     """
-    # Perform an outer join
-    df_joined = pd.merge(
-        df1,
-        df2,
-        how='outer',
-        left_index=True,
-        right_index=True,
-        suffixes=(left_suffix, right_suffix),
-    )
-
-    # Compare the columns to find differences
-    d1_joined = df_joined.filter(like=left_suffix).rename(
-        columns=lambda x: x.rsplit('_', 1)[0]
-    )
-    d2_joined = df_joined.filter(like=right_suffix).rename(
-        columns=lambda x: x.rsplit('_', 1)[0]
-    )
-
-    # Compare two dfs with `ne`, col names must be the same
-    diffs = df_joined[d1_joined.ne(d2_joined).any(axis=1)]
-
-    return diffs
+    if (
+        engine in ('hash', 'sorted', 'auto')
+        and df1.index.is_unique
+        and df2.index.is_unique
+        and df1.columns.equals(df2.columns)
+    ):
+        if (
+            engine in ('sorted', 'auto')
+            and df1.index.is_monotonic_increasing
+            and df2.index.is_monotonic_increasing
+        ):
+            return _sorted_diffs(df1, df2, left_suffix, right_suffix)
+        return _hash_diffs(df1, df2, left_suffix, right_suffix)
+    return _merge_diffs(df1, df2, left_suffix, right_suffix)
 
 
 if __name__ == '__main__':
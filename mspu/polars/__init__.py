@@ -1,3 +1,4 @@
+from .datetime import collapse_date_range, explode_date_range, interval_timeline_sum
 from .utils import (
     pl_ht,
     inf_count,
@@ -9,6 +10,9 @@ from .utils import (
 
 __all__ = [
     'pl_ht',
+    'explode_date_range',
+    'collapse_date_range',
+    'interval_timeline_sum',
     'inf_count',
     'nan_count',
     'nul_count',
@@ -0,0 +1,479 @@
+import re
+import polars as pl
+from datetime import datetime
+from typing import Literal
+
+
+_DURATION_NANOS = {
+    'ns': 1,
+    'us': 1_000,
+    'ms': 1_000_000,
+    's': 1_000_000_000,
+    'm': 60_000_000_000,
+    'h': 3_600_000_000_000,
+    'd': 86_400_000_000_000,
+    'w': 604_800_000_000_000,
+}
+
+
+def _duration_nanos(freq: str, tz: str | None = None) -> int | None:
+    """
+    Get the width of a fixed polars duration string in nanoseconds, None if not fixed.
+
+    Calendar durations ('mo', 'q', 'y') are not fixed, nor are days/weeks
+    of tz-aware dates because of DST.
+    """
+    parts = re.findall(r'(\d+)(ns|us|ms|mo|s|m|h|d|w|q|y)', freq)
+    if not parts or ''.join(n + unit for n, unit in parts) != freq:
+        return None
+    nanos = 0
+    for n, unit in parts:
+        if unit not in _DURATION_NANOS or (tz is not None and unit in ('d', 'w')):
+            return None
+        nanos += int(n) * _DURATION_NANOS[unit]
+    return nanos if nanos > 0 else None
+
+
+def _to_datetime(col: str, dtype: pl.DataType) -> pl.Expr:
+    """
+    Get the expression to parse a string column to datetime.
+    """
+    if dtype == pl.String:
+        return pl.col(col).str.to_datetime()
+    return pl.col(col)
+
+
+def _to_date_bound(date: str | datetime, dtype: pl.DataType) -> pl.Expr:
+    """
+    Get the expression of a date bound in the time zone of the date column.
+
+    A tz-naive bound is in the time zone of the column, like the pandas version.
+    """
+    if isinstance(date, str):
+        date = datetime.fromisoformat(date)
+    bound = pl.lit(date)
+    tz = getattr(dtype, 'time_zone', None)
+    if tz is not None:
+        if date.tzinfo is None:
+            bound = bound.dt.replace_time_zone(tz)
+        else:
+            bound = bound.dt.convert_time_zone(tz)
+    return bound
+
+
+def _roll_date(
+    date: pl.Expr,
+    freq: str,
+    roll: Literal['backward', 'forward'],
+) -> pl.Expr:
+    """
+    Roll the date to the start of the current/next period.
+    """
+    date = date.dt.truncate(freq)
+    if roll == 'forward':
+        date = date.dt.offset_by(freq)
+    return date
+
+
+def _prepare_date_range(
+    df: pl.DataFrame | pl.LazyFrame,
+    start_date_col: str,
+    end_date_col: str,
+    freq: str,
+    start_date_offset: str | None,
+    end_date_offset: str | None,
+    start_date_roll: Literal['backward', 'forward'] | None,
+    end_date_roll: Literal['backward', 'forward'] | None,
+    min_date: str | datetime | None,
+    max_date: str | datetime | None,
+    inclusive: Literal['both', 'left', 'right', 'neither'],
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Offset, roll and limit the start/end dates and remove invalid rows.
+    """
+    schema = df.collect_schema()
+    start_date = _to_datetime(start_date_col, schema[start_date_col])
+    end_date = _to_datetime(end_date_col, schema[end_date_col])
+
+    # offset and roll start date
+    if start_date_offset is not None:
+        start_date = start_date.dt.offset_by(start_date_offset)
+    if start_date_roll is not None:
+        start_date = _roll_date(start_date, freq, start_date_roll)
+
+    # limit start_date and replace null with min_date
+    if min_date is not None:
+        min_date = _to_date_bound(min_date, schema[start_date_col])
+        start_date = start_date.fill_null(min_date).clip(lower_bound=min_date)
+
+    # offset and roll end date
+    if end_date_offset is not None:
+        end_date = end_date.dt.offset_by(end_date_offset)
+    if end_date_roll is not None:
+        end_date = _roll_date(end_date, freq, end_date_roll)
+
+    # limit end_date and replace null with max_date
+    if max_date is not None:
+        max_date = _to_date_bound(max_date, schema[end_date_col])
+        end_date = end_date.fill_null(max_date).clip(upper_bound=max_date)
+
+    # if inclusive = 'left' we expect date_end is exclusive
+    #   so records with start_date == end_date should be excluded
+    df = df.with_columns(start_date.alias(start_date_col), end_date.alias(end_date_col))
+    if inclusive == 'left':
+        df = df.filter(pl.col(start_date_col) < pl.col(end_date_col))
+    else:
+        df = df.filter(pl.col(start_date_col) <= pl.col(end_date_col))
+    return df
+
+
+def explode_date_range(
+    df: pl.DataFrame | pl.LazyFrame,
+    start_date_col: str,
+    end_date_col: str,
+    date_col: str = 'ts',
+    freq: str = '30m',
+    start_date_offset: str = None,
+    end_date_offset: str = None,
+    start_date_roll: Literal['backward', 'forward'] | None = None,
+    end_date_roll: Literal['backward', 'forward'] | None = None,
+    min_date: str | datetime = None,
+    max_date: str | datetime = None,
+    inclusive: Literal['both', 'left', 'right', 'neither'] = 'both',
+    drop_date_cols: bool = True,
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Explode DataFrame start/end date columns to date column.
+
+    The dates are created by `pl.datetime_ranges` and exploded in the polars
+    query engine, so a LazyFrame stays lazy and can be streamed.
+
+    Parameters
+    ----------
+    df:
+        The input DataFrame or LazyFrame with start/end date columns.
+    start_date_col:
+        The column name in the DataFrame for the start date.
+    end_date_col:
+        The column name in the DataFrame for the end date.
+    date_col:
+        The column name in the DataFrame for the new date.
+    freq:
+        The frequency of the new date column, a polars duration string (e.g. '30m').
+    start_date_offset:
+        The date offset for the start date column, a polars duration string.
+    end_date_offset:
+        The date offset for the end date column, a polars duration string.
+    start_date_roll:
+        Roll the start_date to the start of the current/next period.
+    end_date_roll:
+        Roll the end date to the start of the current/next period.
+    min_date:
+        The min value of the start date after offset, a datetime or ISO string.
+    max_date:
+        The max value of the end date after offset, a datetime or ISO string.
+        Tz-naive min/max dates are in the time zone of tz-aware date columns.
+    inclusive:
+        Include boundaries; Whether to set each bound as closed or open.
+    drop_date_cols:
+        Whether to drop the start_date_col and end_date_col or not.
+
+    Returns
+    -------
+    pl.DataFrame | pl.LazyFrame
+        The DataFrame same as the input but with
+        start/end date columns replaced by the new date column
+
+    Examples
+    --------
+    >>> import polars as pl
+    >>> from mspu.polars import explode_date_range
+    >>> df = pl.DataFrame({
+    ...     'start_date': ['2023-01-01 00:00', '2023-01-02 00:00'],
+    ...     'end_date': ['2023-01-01 01:00', '2023-01-02 02:00'],
+    ... })
+    >>> df_exploded = explode_date_range(df, 'start_date', 'end_date', freq='1h')
+    >>> print(df_exploded)
+    shape: (5, 1)
+    ┌─────────────────────┐
+    │ ts                  │
+    │ ---                 │
+    │ datetime[μs]        │
+    ╞═════════════════════╡
+    │ 2023-01-01 00:00:00 │
+    │ 2023-01-01 01:00:00 │
+    │ 2023-01-02 00:00:00 │
+    │ 2023-01-02 01:00:00 │
+    │ 2023-01-02 02:00:00 │
+    └─────────────────────┘
+    """
+    df = _prepare_date_range(
+        df,
+        start_date_col,
+        end_date_col,
+        freq,
+        start_date_offset,
+        end_date_offset,
+        start_date_roll,
+        end_date_roll,
+        min_date,
+        max_date,
+        inclusive,
+    )
+
+    # explode timestamp column, empty ranges are removed
+    closed = 'none' if inclusive == 'neither' else inclusive
+    df = (
+        df.with_columns(
+            pl.datetime_ranges(
+                pl.col(start_date_col), pl.col(end_date_col), freq, closed=closed
+            ).alias(date_col)
+        )
+        .filter(pl.col(date_col).list.len() > 0)
+        .explode(date_col)
+    )
+
+    # drop start_date_col and end_date_col
+    if drop_date_cols:
+        df = df.drop(start_date_col, end_date_col)
+
+    return df
+
+
+def collapse_date_range(
+    df: pl.DataFrame | pl.LazyFrame,
+    start_date_col: str,
+    end_date_col: str,
+    date_col: str = 'ts',
+    freq: str = '30m',
+    by: list[str] = None,
+    inclusive: Literal['both', 'left'] = 'both',
+    sort: bool = True,
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Collapse DataFrame date column to start/end date columns.
+
+    This is the inverse of `explode_date_range`. Consecutive dates with the
+    same values in the by columns are collapsed to one row, a new row starts
+    where a by column changes or the date is not the previous date plus freq.
+
+    Parameters
+    ----------
+    df:
+        The input DataFrame or LazyFrame with the date column.
+    start_date_col:
+        The column name in the new DataFrame for the start date.
+    end_date_col:
+        The column name in the new DataFrame for the end date.
+    date_col:
+        The column name in the DataFrame for the date.
+    freq:
+        The frequency of the date column, a polars duration string (e.g. '30m').
+    by:
+        The columns that must be the same in a date range.
+        All columns except the date column are used if None.
+    inclusive:
+        Whether the end date is the last date ('both')
+        or the last date plus freq ('left').
+    sort:
+        Whether to sort the DataFrame by the by columns and the date column.
+        If False, the DataFrame must be sorted already.
+
+    Returns
+    -------
+    pl.DataFrame | pl.LazyFrame
+        The DataFrame with the by columns and start/end date columns
+
+    Examples
+    --------
+    >>> import polars as pl
+    >>> from datetime import datetime
+    >>> from mspu.polars import collapse_date_range
+    >>> df = pl.DataFrame({
+    ...     'asset': ['a', 'a', 'a', 'b'],
+    ...     'ts': [
+    ...         datetime(2023, 1, 1, 0, 0),
+    ...         datetime(2023, 1, 1, 0, 30),
+    ...         datetime(2023, 1, 1, 2, 0),
+    ...         datetime(2023, 1, 1, 0, 0),
+    ...     ],
+    ... })
+    >>> print(collapse_date_range(df, 'start_date', 'end_date'))
+    shape: (3, 3)
+    ┌───────┬─────────────────────┬─────────────────────┐
+    │ asset ┆ start_date          ┆ end_date            │
+    │ ---   ┆ ---                 ┆ ---                 │
+    │ str   ┆ datetime[μs]        ┆ datetime[μs]        │
+    ╞═══════╪═════════════════════╪═════════════════════╡
+    │ a     ┆ 2023-01-01 00:00:00 ┆ 2023-01-01 00:30:00 │
+    │ a     ┆ 2023-01-01 02:00:00 ┆ 2023-01-01 02:00:00 │
+    │ b     ┆ 2023-01-01 00:00:00 ┆ 2023-01-01 00:00:00 │
+    └───────┴─────────────────────┴─────────────────────┘
+    """
+    if by is None:
+        by = [col for col in df.collect_schema().names() if col != date_col]
+    if sort:
+        df = df.sort([*by, date_col], maintain_order=True)
+
+    # a new date range starts where a key changes or a date is missing
+    new_range = (
+        pl.col(date_col).shift(1).dt.offset_by(freq).ne_missing(pl.col(date_col))
+    )
+    for col in by:
+        new_range |= pl.col(col).shift(1).ne_missing(pl.col(col))
+    new_range = new_range | (pl.int_range(pl.len()) == 0)
+
+    end_date = pl.col(date_col).last()
+    if inclusive == 'left':
+        end_date = end_date.dt.offset_by(freq)
+    df = (
+        df.with_columns(new_range.cum_sum().alias('_range'))
+        .group_by('_range', maintain_order=True)
+        .agg(
+            *[pl.col(col).first() for col in by],
+            pl.col(date_col).first().alias(start_date_col),
+            end_date.alias(end_date_col),
+        )
+        .drop('_range')
+    )
+    return df
+
+
+def interval_timeline_sum(
+    df: pl.DataFrame | pl.LazyFrame,
+    start_date_col: str,
+    end_date_col: str,
+    value_cols: list[str],
+    date_col: str = 'ts',
+    freq: str = '30m',
+    by: list[str] = None,
+    start_date_offset: str = None,
+    end_date_offset: str = None,
+    start_date_roll: Literal['backward', 'forward'] | None = None,
+    end_date_roll: Literal['backward', 'forward'] | None = None,
+    min_date: str | datetime = None,
+    max_date: str | datetime = None,
+    inclusive: Literal['both', 'left', 'right', 'neither'] = 'both',
+) -> pl.DataFrame | pl.LazyFrame:
+    """
+    Sum the values of start/end date ranges for each date without exploding.
+
+    The result is the same as `explode_date_range` followed by a sum of the value
+    columns grouped by the by columns and the date column. For fixed durations,
+    each row adds +value/-value events at its first/after its last date and a
+    cumulative sum of the events gives the total between two events, so only
+    the output dates are created. Calendar durations (e.g. '1mo') are exploded.
+    Only the dates covered by at least one row are returned.
+
+    Parameters
+    ----------
+    df:
+        The input DataFrame or LazyFrame with start/end date columns.
+    value_cols:
+        The numeric columns to sum for each date.
+    by:
+        The columns to group the sums by, in addition to the date column.
+
+    The other parameters are the same as `explode_date_range`.
+
+    Returns
+    -------
+    pl.DataFrame | pl.LazyFrame
+        The DataFrame with the by columns, the date column and the value columns,
+        sorted by the by columns and the date column
+
+    Examples
+    --------
+    >>> import polars as pl
+    >>> from mspu.polars import interval_timeline_sum
+    >>> df = pl.DataFrame({
+    ...     'start_date': ['2023-01-01 00:00', '2023-01-01 01:00'],
+    ...     'end_date': ['2023-01-01 02:00', '2023-01-01 03:00'],
+    ...     'capacity': [10, 5],
+    ... })
+    >>> df_sum = interval_timeline_sum(
+    ...     df, 'start_date', 'end_date', ['capacity'], freq='1h', inclusive='left'
+    ... )
+    >>> print(df_sum)
+    shape: (3, 2)
+    ┌─────────────────────┬──────────┐
+    │ ts                  ┆ capacity │
+    │ ---                 ┆ ---      │
+    │ datetime[μs]        ┆ i64      │
+    ╞═════════════════════╪══════════╡
+    │ 2023-01-01 00:00:00 ┆ 10       │
+    │ 2023-01-01 01:00:00 ┆ 15       │
+    │ 2023-01-01 02:00:00 ┆ 5        │
+    └─────────────────────┴──────────┘
+    """
+    by = [] if by is None else list(by)
+    df = _prepare_date_range(
+        df.select(*by, *value_cols, start_date_col, end_date_col),
+        start_date_col,
+        end_date_col,
+        freq,
+        start_date_offset,
+        end_date_offset,
+        start_date_roll,
+        end_date_roll,
+        min_date,
+        max_date,
+        inclusive,
+    )
+    dtype = df.collect_schema()[start_date_col]
+    step = _duration_nanos(freq, getattr(dtype, 'time_zone', None))
+    if step is None:
+        df = explode_date_range(
+            df, start_date_col, end_date_col, date_col, freq, inclusive=inclusive
+        )
+        return (
+            df.group_by(*by, date_col)
+            .agg(pl.col(value_cols).sum())
+            .sort(*by, date_col, maintain_order=True)
+        )
+
+    # first/last slot number of each row, like `pl.datetime_ranges`
+    start = pl.col(start_date_col).dt.epoch('ns')
+    end = pl.col(end_date_col).dt.epoch('ns')
+    first = 1 if inclusive in ('right', 'neither') else 0
+    last = (end - start) // step
+    if inclusive in ('left', 'neither'):
+        last = last - ((end - start) % step == 0).cast(pl.Int64)
+    df = df.filter(last >= first).select(
+        *by,
+        pl.col(value_cols).fill_null(0),
+        (start + first * step).alias('_first'),
+        (start + (last + 1) * step).alias('_end'),
+    )
+
+    # dates of rows with a different phase within the step are not merged
+    keys = [*by, '_phase']
+    events = pl.concat(
+        [
+            df.select(*by, pl.col(value_cols), pl.lit(1).alias('_n'), _t='_first'),
+            df.select(*by, -pl.col(value_cols), pl.lit(-1).alias('_n'), _t='_end'),
+        ]
+    ).with_columns((pl.col('_t') % step).alias('_phase'))
+    events = (
+        events.group_by(*keys, '_t')
+        .agg(pl.col(*value_cols, '_n').sum())
+        .sort(*keys, '_t')
+        .with_columns(
+            pl.col(*value_cols, '_n').cum_sum().over(keys),
+            pl.col('_t').shift(-1).over(keys).alias('_next'),
+        )
+        .filter(pl.col('_n') > 0)
+    )
+
+    # the dates between two events have the cumulative sum of the first event
+    date = pl.from_epoch(pl.col(date_col), time_unit='ns')
+    if dtype.time_zone is not None:
+        date = date.dt.replace_time_zone('UTC').dt.convert_time_zone(dtype.time_zone)
+    return (
+        events.with_columns(
+            pl.int_ranges('_t', '_next', step, dtype=pl.Int64).alias(date_col)
+        )
+        .explode(date_col)
+        .select(*by, date.dt.cast_time_unit(dtype.time_unit), *value_cols)
+        .sort(*by, date_col, maintain_order=True)
+    )
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+from polars.testing import assert_series_equal as pl_assert_series_equal
+from pandas.testing import assert_index_equal, assert_series_equal
+from mspu.datetime import datetime_to_interval, interval_to_datetime
+
+
+def test_numpy():
+    dates = np.array(
+        [
+            '1999-12-31 23:30',
+            '2000-01-01 00:00',
+            '2000-01-01 00:45',
+            '2000-01-02 00:00',
+        ],
+        dtype='datetime64[ns]',
+    )
+
+    intervals = datetime_to_interval(dates)
+    assert intervals.dtype == np.int32
+    assert intervals.tolist() == [-1, 0, 1, 48]
+
+    dates_start = interval_to_datetime(intervals)
+    assert dates_start.dtype == np.dtype('datetime64[ns]')
+    assert (
+        dates_start == dates.astype('datetime64[m]').astype('datetime64[ns]')
+    ).sum() == 3
+
+
+@pytest.mark.parametrize('tz', [None, 'Australia/Sydney'])
+def test_pandas(tz):
+    dates = pd.Series(
+        pd.to_datetime(['2023-04-02 01:30', None, '2023-04-02 03:00']), name='ts'
+    )
+    if tz is not None:
+        dates = dates.dt.tz_localize(tz, ambiguous=True)
+
+    intervals = datetime_to_interval(dates, epoch='2023-04-02', freq='30min')
+    expected = [3, pd.NA, 6 if tz is None else 8]
+    assert_series_equal(intervals, pd.Series(expected, dtype='Int32', name='ts'))
+    assert_series_equal(
+        interval_to_datetime(intervals, epoch='2023-04-02', freq='30min', tz=tz),
+        dates,
+    )
+
+    index = pd.DatetimeIndex(dates.dropna())
+    intervals = datetime_to_interval(index, epoch='2023-04-02', freq='30min')
+    assert intervals.dtype == np.int32
+    assert_index_equal(
+        interval_to_datetime(intervals, epoch='2023-04-02', freq='30min', tz=tz),
+        index,
+    )
+
+
+@pytest.mark.parametrize('tz', [None, 'Australia/Brisbane'])
+def test_polars(tz):
+    dates = pl.Series(
+        'ts',
+        ['2023-01-01 00:00', None, '2023-01-01 01:05'],
+    ).str.to_datetime(time_unit='ns', time_zone=tz)
+
+    intervals = datetime_to_interval(dates, epoch='2023-01-01', freq='5min')
+    pl_assert_series_equal(intervals, pl.Series('ts', [0, None, 13], dtype=pl.Int32))
+    result = interval_to_datetime(intervals, epoch='2023-01-01', freq='5min', tz=tz)
+    pl_assert_series_equal(result, dates)
+
+
+def test_int32_overflow():
+    dates = pd.Series(pd.to_datetime(['2000-01-01', '2100-01-01']))
+    with pytest.raises(ValueError):
+        datetime_to_interval(dates, freq='1s')
+
+
+@pytest.mark.parametrize('freq, expected', [('h', [0, 1, 24]), ('D', [0, 0, 1])])
+def test_unit_freq(freq, expected):
+    dates = pd.Series(
+        pd.to_datetime(['2000-01-01 00:00', '2000-01-01 01:30', '2000-01-02 00:00'])
+    )
+    intervals = datetime_to_interval(dates, freq=freq)
+    assert intervals.tolist() == expected
+    dates_start = interval_to_datetime(intervals, freq=freq)
+    assert (dates_start == dates.dt.floor(freq)).all()
+
+
+@pytest.mark.parametrize('freq', ['MS', 'W', '0h'])
+def test_invalid_freq(freq):
+    with pytest.raises(ValueError):
+        datetime_to_interval(pd.Series(pd.to_datetime(['2000-01-01'])), freq=freq)
+
+
+def test_numpy_nat():
+    dates = np.array(['2000-01-01', 'NaT'], dtype='datetime64[ns]')
+    with pytest.raises(ValueError, match='NaT'):
+        datetime_to_interval(dates)
@@ -1,7 +1,21 @@
+import operator
+import numpy as np
 import pandas as pd
 import pytest
 from pandas.testing import assert_frame_equal
-from mspu.pandas import explode_date_range
+from mspu.pandas import (
+    ExplodedView,
+    apply_profile,
+    collapse_date_range,
+    explode_date_range,
+    explode_date_range_counts,
+    interval_overlap_join,
+    interval_timeline_sum,
+    iter_explode_date_range,
+    set_date_range_cache,
+)
+import mspu.pandas.datetime as pd_datetime
+from mspu.pandas.datetime import _DATE_RANGE_CACHE
 
 
 def test_basic():
@@ -93,3 +107,805 @@ def test_invalid_column_names():
 
     with pytest.raises(KeyError):
         explode_date_range(df, 'invalid_start', 'end_date', freq='1h')
+
+
+@pytest.mark.parametrize('inclusive', ['both', 'left', 'right', 'neither'])
+def test_vectorized_engine(inclusive):
+    df = pd.DataFrame(
+        {
+            'id': [1, 2, 3, 4],
+            'start_date': pd.to_datetime(
+                ['2023-01-01 00:00', '2023-01-01 00:10', '2023-01-02 00:00', None]
+            ),
+            'end_date': pd.to_datetime(
+                [
+                    '2023-01-01 02:00',
+                    '2023-01-01 01:50',
+                    '2023-01-02 00:00',
+                    '2023-01-03 00:00',
+                ]
+            ),
+        }
+    )
+
+    result = explode_date_range(
+        df, 'start_date', 'end_date', freq='30min', inclusive=inclusive
+    )
+    expected = explode_date_range(
+        df, 'start_date', 'end_date', freq='30min', inclusive=inclusive, engine='loop'
+    )
+
+    assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('freq', ['MS', 'QS', 'W-MON', 'YS'])
+@pytest.mark.parametrize('inclusive', ['both', 'left', 'right', 'neither'])
+def test_vectorized_engine_calendar_freq(freq, inclusive):
+    df = pd.DataFrame(
+        {
+            'id': [1, 2, 3, 4],
+            'start_date': pd.to_datetime(
+                ['2023-01-01 00:00', '2023-01-15 00:00', '2023-04-01 10:00', None]
+            ),
+            'end_date': pd.to_datetime(
+                [
+                    '2025-01-01 00:00',
+                    '2023-07-01 00:00',
+                    '2024-04-01 09:00',
+                    '2024-01-01 00:00',
+                ]
+            ),
+        }
+    )
+
+    result = explode_date_range(
+        df, 'start_date', 'end_date', freq=freq, inclusive=inclusive
+    )
+    expected = explode_date_range(
+        df, 'start_date', 'end_date', freq=freq, inclusive=inclusive, engine='loop'
+    )
+
+    assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('drop_index', [True, False])
+def test_iter_explode_date_range(drop_index):
+    df = pd.DataFrame(
+        {
+            'id': [1, 2, 3, 4],
+            'start_date': pd.to_datetime(
+                ['2023-01-01 00:00', '2023-01-02 00:00', '2023-01-03 00:00', None]
+            ),
+            'end_date': pd.to_datetime(
+                ['2023-01-01 01:00', '2023-01-02 05:00', '2023-01-03 00:00', None]
+            ),
+        }
+    ).set_index('id')
+
+    batches = list(
+        iter_explode_date_range(
+            df,
+            'start_date',
+            'end_date',
+            freq='1h',
+            drop_index=drop_index,
+            batch_rows=3,
+        )
+    )
+    expected = explode_date_range(
+        df, 'start_date', 'end_date', freq='1h', drop_index=drop_index
+    )
+
+    assert [len(batch) for batch in batches] == [2, 6, 1]
+    assert_frame_equal(pd.concat(batches), expected)
+
+
+@pytest.mark.parametrize('freq', ['30min', 'MS', '2MS'])
+def test_explode_date_range_counts(freq):
+    df = pd.DataFrame(
+        {
+            'id': [1, 2, 3, 4, 5],
+            'start_date': pd.to_datetime(
+                ['2023-01-01', '2023-01-15', '2023-03-01', None, '2023-05-01']
+            ),
+            'end_date': pd.to_datetime(
+                ['2023-01-03', '2023-06-01', '2023-02-01', '2023-04-01', None]
+            ),
+        }
+    )
+    kwargs = {'freq': freq, 'min_date': '2023-01-10', 'inclusive': 'left'}
+
+    counts, offsets = explode_date_range_counts(df, 'start_date', 'end_date', **kwargs)
+    result = explode_date_range(df, 'start_date', 'end_date', **kwargs)
+    expected = result['id'].value_counts().reindex(df['id'], fill_value=0)
+
+    assert counts.tolist() == expected.tolist()
+    assert offsets.tolist() == [0, *expected.cumsum()]
+
+
+def test_apportion():
+    df = pd.DataFrame(
+        {
+            'start_date': pd.to_datetime(['2023-01-01 00:00', '2023-01-02 00:10']),
+            'end_date': pd.to_datetime(['2023-01-01 01:00', '2023-01-02 01:00']),
+            'volume': [4.0, 6.0],
+        }
+    )
+
+    result = explode_date_range(
+        df,
+        'start_date',
+        'end_date',
+        freq='30min',
+        inclusive='left',
+        apportion_cols=['volume'],
+    )
+    assert result['volume'].tolist() == [2.0, 2.0, 3.0, 3.0]
+
+    result = explode_date_range(
+        df,
+        'start_date',
+        'end_date',
+        freq='30min',
+        inclusive='left',
+        apportion_cols=['volume'],
+        apportion_method='duration',
+    )
+    assert result['volume'].round(6).tolist() == [2.0, 2.0, 3.6, 2.4]
+
+
+def test_tz_aware():
+    tz = 'Australia/Sydney'
+    df = pd.DataFrame(
+        {
+            'start_date': pd.to_datetime(
+                ['2023-04-02 00:00', '2023-05-01 00:00', '2023-10-01 00:00']
+            ).tz_localize(tz),
+            'end_date': pd.to_datetime(
+                ['2023-04-03 00:00', '2023-05-02 00:00', '2023-10-02 00:00']
+            ).tz_localize(tz),
+        }
+    )
+
+    result = explode_date_range(
+        df, 'start_date', 'end_date', freq='30min', inclusive='left'
+    )
+    assert str(result['ts'].dt.tz) == tz
+    assert result['ts'].dt.date.value_counts().sort_index().tolist() == [50, 48, 46]
+
+    for freq in ['30min', 'D', 'MS']:
+        result = explode_date_range(df, 'start_date', 'end_date', freq=freq)
+        expected = explode_date_range(
+            df, 'start_date', 'end_date', freq=freq, engine='loop'
+        )
+        assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('inclusive', ['both', 'left'])
+def test_collapse_date_range(inclusive):
+    df = pd.DataFrame(
+        {
+            'asset': ['b', 'a', 'a', 'a', 'a'],
+            'status': ['on', 'on', 'on', 'off', 'off'],
+            'start_date': pd.to_datetime(
+                [
+                    '2023-01-01 00:00',
+                    '2023-01-01 00:00',
+                    '2023-01-01 02:00',
+                    '2023-01-01 01:00',
+                    '2023-01-01 03:00',
+                ]
+            ),
+            'end_date': pd.to_datetime(
+                [
+                    '2023-01-01 01:00',
+                    '2023-01-01 01:00',
+                    '2023-01-01 03:00',
+                    '2023-01-01 02:00',
+                    '2023-01-01 04:00',
+                ]
+            ),
+        }
+    )
+    df_exploded = explode_date_range(
+        df, 'start_date', 'end_date', inclusive='left'
+    ).sample(frac=1, random_state=1)
+
+    result = collapse_date_range(
+        df_exploded, 'start_date', 'end_date', inclusive=inclusive
+    )
+    expected = pd.DataFrame(
+        {
+            'asset': ['a', 'a', 'a', 'a', 'b'],
+            'status': ['off', 'off', 'on', 'on', 'on'],
+            'start_date': pd.to_datetime(
+                [
+                    '2023-01-01 01:00',
+                    '2023-01-01 03:00',
+                    '2023-01-01 00:00',
+                    '2023-01-01 02:00',
+                    '2023-01-01 00:00',
+                ]
+            ),
+            'end_date': pd.to_datetime(
+                [
+                    '2023-01-01 01:30',
+                    '2023-01-01 03:30',
+                    '2023-01-01 00:30',
+                    '2023-01-01 02:30',
+                    '2023-01-01 00:30',
+                ]
+            ),
+        }
+    )
+    if inclusive == 'left':
+        expected['end_date'] += pd.Timedelta('30min')
+
+    assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('freq', ['30min', 'h', 'D', 'MS', 'B'])
+@pytest.mark.parametrize('inclusive', ['both', 'left', 'right', 'neither'])
+def test_interval_timeline_sum(freq, inclusive):
+    df = pd.DataFrame(
+        {
+            'asset': ['a', 'a', 'b', 'a'],
+            'start_date': pd.to_datetime(
+                [
+                    '2023-01-01 00:00',
+                    '2023-01-01 01:10',
+                    '2023-01-01 00:00',
+                    '2023-02-01 00:00',
+                ]
+            ),
+            'end_date': pd.to_datetime(
+                [
+                    '2023-01-03 00:00',
+                    '2023-03-02 03:00',
+                    '2023-01-01 02:00',
+                    '2023-02-05 00:00',
+                ]
+            ),
+            'capacity': [10, 5, 2, 1],
+            'volume': [1.5, 2.5, None, 4.0],
+        }
+    )
+
+    result = interval_timeline_sum(
+        df,
+        'start_date',
+        'end_date',
+        ['capacity', 'volume'],
+        freq=freq,
+        by=['asset'],
+        inclusive=inclusive,
+    )
+    expected = (
+        explode_date_range(df, 'start_date', 'end_date', freq=freq, inclusive=inclusive)
+        .groupby(['asset', 'ts'])[['capacity', 'volume']]
+        .sum()
+        .reset_index()
+    )
+    assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('freq', ['7h', 'MS', 'W-MON', 'B'])
+@pytest.mark.parametrize('inclusive', ['both', 'left', 'right', 'neither'])
+def test_many_start_times(freq, inclusive):
+    # the start dates have many times of day (and phases of a fixed frequency)
+    rng = np.random.default_rng(0)
+    start = pd.Timestamp('2023-01-01') + pd.to_timedelta(
+        rng.integers(0, 90 * 86400, 200), 's'
+    )
+    df = pd.DataFrame(
+        {
+            'asset': rng.choice(['a', 'b'], 200),
+            'start_date': start,
+            'end_date': start + pd.to_timedelta(rng.integers(0, 40 * 86400, 200), 's'),
+            'capacity': rng.integers(0, 10, 200),
+        }
+    )
+    df.loc[::10, 'end_date'] = df['end_date'].dt.normalize()
+
+    kwargs = dict(freq=freq, inclusive=inclusive)
+    result = explode_date_range(df, 'start_date', 'end_date', **kwargs)
+    expected = explode_date_range(df, 'start_date', 'end_date', engine='loop', **kwargs)
+    assert_frame_equal(result, expected)
+
+    result = interval_timeline_sum(
+        df, 'start_date', 'end_date', ['capacity'], by=['asset'], **kwargs
+    )
+    expected = expected.groupby(['asset', 'ts'])[['capacity']].sum().reset_index()
+    assert_frame_equal(result, expected)
+
+
+def test_date_range_cache():
+    df = pd.DataFrame(
+        {
+            'site': range(6),
+            'start_date': pd.to_datetime(['2023-01-02 00:00', '2023-02-01 00:00'] * 3),
+            'end_date': pd.to_datetime(['2023-01-09 00:00', '2023-02-10 00:00'] * 3),
+        }
+    )
+    expected = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    'site': r.site,
+                    'ts': pd.date_range(r.start_date, r.end_date, freq='B'),
+                }
+            )
+            for r in df.itertuples()
+        ],
+        ignore_index=True,
+    )
+
+    # unique start/end pairs are exploded once and broadcast
+    result = explode_date_range(df, 'start_date', 'end_date', freq='B', engine='loop')
+    assert_frame_equal(result, expected)
+
+    # the least recently used date range is evicted
+    set_date_range_cache(10)
+    try:
+        for _ in range(2):
+            result = explode_date_range(
+                df, 'start_date', 'end_date', freq='B', engine='loop'
+            )
+            assert_frame_equal(result, expected)
+            assert len(_DATE_RANGE_CACHE.ranges) == 1
+            assert _DATE_RANGE_CACHE.size == 8
+    finally:
+        set_date_range_cache(0)
+    assert len(_DATE_RANGE_CACHE.ranges) == 0
+
+
+@pytest.mark.parametrize('encode_strings', ['category', 'dictionary'])
+def test_encode_strings(encode_strings):
+    if encode_strings == 'dictionary':
+        pytest.importorskip('pyarrow')
+    df = pd.DataFrame(
+        {
+            'site': ['site_a' * 10, 'site_b' * 10, 'site_a' * 10],
+            'capacity': [1, 2, 3],
+            'start_date': pd.to_datetime(['2023-01-01 00:00'] * 3),
+            'end_date': pd.to_datetime(['2023-01-02 00:00'] * 3),
+        }
+    )
+
+    expected = explode_date_range(df, 'start_date', 'end_date')
+    result = explode_date_range(
+        df, 'start_date', 'end_date', encode_strings=encode_strings
+    )
+    if encode_strings == 'category':
+        assert isinstance(result['site'].dtype, pd.CategoricalDtype)
+    else:
+        assert str(result['site'].dtype).startswith('dictionary')
+    assert result['site'].memory_usage(deep=True) < expected['site'].memory_usage(
+        deep=True
+    )
+    assert_frame_equal(result.astype({'site': object}), expected)
+
+
+@pytest.mark.parametrize('tz', [None, 'Australia/Sydney'])
+def test_dtype_backend_pyarrow(tz):
+    pa = pytest.importorskip('pyarrow')
+    df = pd.DataFrame(
+        {
+            'site': ['a', 'b'],
+            'capacity': [1.5, 2.0],
+            'start_date': pd.to_datetime(['2023-01-01 00:00', '2023-01-02 00:00']),
+            'end_date': pd.to_datetime(['2023-01-01 01:00', '2023-01-02 02:00']),
+        }
+    ).set_index('site')
+    if tz is not None:
+        df[['start_date', 'end_date']] = df[['start_date', 'end_date']].apply(
+            lambda ds: ds.dt.tz_localize(tz)
+        )
+
+    # a frame with only the start/end date columns
+    result = explode_date_range(
+        df[['start_date', 'end_date']],
+        'start_date',
+        'end_date',
+        freq='h',
+        dtype_backend='pyarrow',
+    )
+    assert result.columns.tolist() == ['ts']
+    assert len(result) == 5
+
+    for drop_index in [True, False]:
+        expected = explode_date_range(
+            df, 'start_date', 'end_date', freq='h', drop_index=drop_index
+        )
+        result = explode_date_range(
+            df,
+            'start_date',
+            'end_date',
+            freq='h',
+            drop_index=drop_index,
+            dtype_backend='pyarrow',
+        )
+        assert all(isinstance(dtype, pd.ArrowDtype) for dtype in result.dtypes)
+        assert result['ts'].dtype.pyarrow_dtype == pa.timestamp('ns', tz)
+        result = result.astype(expected.dtypes.to_dict())
+        if not drop_index:
+            result.index = result.index.astype(object)
+        assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('freq', ['30min', '2h', 'D', '15s'])
+def test_roll_and_offset_fixed_freq(freq):
+    df = pd.DataFrame(
+        {
+            'start_date': pd.to_datetime(
+                ['2023-01-01 00:10:07', '2023-01-02 13:45:00', None]
+            ),
+            'end_date': pd.to_datetime(
+                ['2023-01-01 05:20:00', '2023-01-03 01:59:59', '2023-01-03 02:00:00']
+            ),
+        }
+    )
+    start_offset = pd.DateOffset(hours=1, minutes=3)
+    end_offset = pd.DateOffset(days=1)
+
+    result = explode_date_range(
+        df,
+        'start_date',
+        'end_date',
+        freq=freq,
+        start_date_offset=start_offset,
+        end_date_offset=end_offset,
+        start_date_roll='forward',
+        end_date_roll='backward',
+        min_date='2023-01-01 00:00',
+    )
+    df_rolled = pd.DataFrame(
+        {
+            'start_date': (
+                (df['start_date'] + start_offset).dt.to_period(freq) + 1
+            ).dt.start_time,
+            'end_date': (df['end_date'] + end_offset).dt.to_period(freq).dt.start_time,
+        }
+    )
+    expected = explode_date_range(
+        df_rolled, 'start_date', 'end_date', freq=freq, min_date='2023-01-01 00:00'
+    )
+    assert_frame_equal(result, expected)
+
+
+def test_freq_column():
+    df = pd.DataFrame(
+        {
+            'freq': ['30min', 'D', '5min', '30min'],
+            'volume': [6.0, 3.0, 4.0, 2.0],
+            'start_date': pd.to_datetime(
+                [
+                    '2023-01-01 00:10',
+                    '2023-01-01 00:00',
+                    '2023-01-01 00:00',
+                    '2023-01-02 00:00',
+                ]
+            ),
+            'end_date': pd.to_datetime(
+                [
+                    '2023-01-01 01:40',
+                    '2023-01-03 00:00',
+                    '2023-01-01 00:20',
+                    '2023-01-02 00:30',
+                ]
+            ),
+        }
+    )
+    kwargs = dict(
+        start_date_roll='forward', inclusive='left', apportion_cols=['volume']
+    )
+
+    result = explode_date_range(df, 'start_date', 'end_date', freq_col='freq', **kwargs)
+    expected = pd.concat(
+        [
+            explode_date_range(
+                df.iloc[[i]], 'start_date', 'end_date', freq=freq, **kwargs
+            )
+            for i, freq in enumerate(df['freq'])
+        ],
+        ignore_index=True,
+    )
+    assert_frame_equal(result, expected)
+
+    counts, _ = explode_date_range_counts(
+        df,
+        'start_date',
+        'end_date',
+        start_date_roll='forward',
+        inclusive='left',
+        freq_col='freq',
+    )
+    assert counts.tolist() == [2, 1, 3, 0]
+    batches = iter_explode_date_range(
+        df, 'start_date', 'end_date', batch_rows=3, freq_col='freq', **kwargs
+    )
+    assert_frame_equal(pd.concat(batches), expected)
+
+    # null frequencies use freq
+    result = explode_date_range(
+        df.assign(freq=[None, 'D', '5min', '30min']),
+        'start_date',
+        'end_date',
+        freq='30min',
+        freq_col='freq',
+        **kwargs,
+    )
+    assert_frame_equal(result, expected.assign(freq=result['freq']))
+
+    # a column named as the frequency is not a frequency column
+    df_h = df.rename(columns={'freq': 'h'})
+    result = explode_date_range(df_h, 'start_date', 'end_date', freq='h', **kwargs)
+    expected = explode_date_range(
+        df_h.drop(columns='h'), 'start_date', 'end_date', freq='h', **kwargs
+    )
+    assert_frame_equal(result.drop(columns='h'), expected)
+
+
+@pytest.mark.parametrize('drop_date_cols', [True, False])
+def test_keep_multiindex(drop_date_cols):
+    df = pd.DataFrame(
+        {
+            'site': ['a', 'b', 'a'],
+            'unit': [1, 1, 2],
+            'start_date': pd.to_datetime(
+                ['2023-01-01 00:00', '2023-01-01 01:00', '2023-01-01 03:00']
+            ),
+            'end_date': pd.to_datetime(
+                ['2023-01-01 01:00', '2023-01-01 00:00', '2023-01-01 04:00']
+            ),
+            'volume': [1.0, 2.0, 3.0],
+        }
+    ).set_index(['site', 'unit', 'start_date'])
+
+    result = explode_date_range(
+        df,
+        'start_date',
+        'end_date',
+        freq='h',
+        drop_index=False,
+        drop_date_cols=drop_date_cols,
+    )
+    expected = explode_date_range(
+        df.reset_index(),
+        'start_date',
+        'end_date',
+        freq='h',
+        drop_date_cols=drop_date_cols,
+    )
+    if drop_date_cols:
+        expected = expected.set_index(['site', 'unit', 'ts'])
+    else:
+        expected = expected.set_index(['site', 'unit', 'start_date', 'end_date', 'ts'])
+    assert_frame_equal(result, expected)
+
+
+def test_exploded_view():
+    df = pd.DataFrame(
+        {
+            'site': ['a', 'b', 'c', 'd'],
+            'start_date': pd.to_datetime(
+                [
+                    '2023-01-01 00:00',
+                    '2023-01-01 05:00',
+                    '2023-01-02 00:00',
+                    '2023-01-03 00:00',
+                ]
+            ),
+            'end_date': pd.to_datetime(
+                [
+                    '2023-01-01 02:00',
+                    '2023-01-01 04:00',
+                    '2023-01-02 00:00',
+                    '2023-01-03 03:00',
+                ]
+            ),
+        }
+    )
+    expected = explode_date_range(df, 'start_date', 'end_date', freq='h')
+
+    view = ExplodedView(df, 'start_date', 'end_date', freq='h')
+    assert len(view) == len(expected)
+    assert view.counts.tolist() == [3, 1, 4]
+    assert_frame_equal(view.to_pandas(), expected)
+    for start, stop in [(0, 1), (2, 5), (3, 4), (-3, None), (5, 5), (6, 100)]:
+        assert_frame_equal(view[start:stop], expected[start:stop])
+    assert view[4].equals(expected.iloc[4])
+    assert view[-1].equals(expected.iloc[-1])
+    with pytest.raises(IndexError):
+        view[len(view)]
+    with pytest.raises(ValueError):
+        view[::2]
+
+
+@pytest.mark.parametrize('tz', [None, 'Australia/Sydney'])
+@pytest.mark.parametrize('nslots', [48, 336])
+def test_apply_profile(tz, nslots):
+    df = pd.DataFrame(
+        {
+            'start_date': pd.to_datetime(['2023-03-30 00:00', '2023-04-05 07:00']),
+            'end_date': pd.to_datetime(['2023-04-04 00:00', '2023-04-12 00:00']),
+            'load': [2.0, 3.0],
+        }
+    )
+    if tz is not None:
+        df[['start_date', 'end_date']] = df[['start_date', 'end_date']].apply(
+            lambda ds: ds.dt.tz_localize(tz)
+        )
+    df = explode_date_range(df, 'start_date', 'end_date', inclusive='left')
+    profile = np.arange(nslots) / nslots
+
+    result = apply_profile(df, profile, ['load'])
+    local = df['ts'] if tz is None else df['ts'].dt.tz_localize(None)
+    slot = local.dt.hour * 2 + local.dt.minute // 30
+    if nslots == 336:
+        slot += local.dt.dayofweek * 48
+    expected = df.assign(load=df['load'] * profile[slot.to_numpy()])
+    assert_frame_equal(result, expected)
+
+    result = apply_profile(df, profile, profile_col='factor')
+    assert_frame_equal(result, df.assign(factor=profile[slot.to_numpy()]))
+
+    with pytest.raises(ValueError):
+        apply_profile(df, profile[:-1], ['load'])
+    with pytest.raises(ValueError, match='at least one'):
+        apply_profile(df, [], ['load'])
+
+    # null dates get a NaN profile value
+    df.loc[0, 'ts'] = pd.NaT
+    result = apply_profile(df, profile, ['load'])
+    assert np.isnan(result.loc[0, 'load'])
+    assert_frame_equal(result.iloc[1:], expected.iloc[1:])
+
+
+@pytest.mark.parametrize('dtype_backend', [None, 'pyarrow'])
+def test_interval_epoch(dtype_backend):
+    if dtype_backend == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    tz = 'Australia/Brisbane'
+    df = pd.DataFrame(
+        {
+            'start_date': pd.to_datetime(['2023-01-01 00:00', '2023-01-02 00:00']),
+            'end_date': pd.to_datetime(['2023-01-01 01:00', '2023-01-02 00:30']),
+        }
+    ).apply(lambda ds: ds.dt.tz_localize(tz))
+
+    result = explode_date_range(
+        df,
+        'start_date',
+        'end_date',
+        interval_epoch='2023-01-01',
+        dtype_backend=dtype_backend,
+    )
+    assert result['ts'].tolist() == [0, 1, 2, 48, 49]
+    assert str(result['ts'].dtype).startswith('int32')
+
+    result = explode_date_range(
+        df, 'start_date', 'end_date', freq='h', interval_epoch='2023-01-01'
+    )
+    assert result['ts'].tolist() == [0, 1, 24]
+
+    with pytest.raises(ValueError):
+        explode_date_range(
+            df.assign(freq='h'),
+            'start_date',
+            'end_date',
+            interval_epoch='2023-01-01',
+            freq_col='freq',
+        )
+
+
+@pytest.mark.parametrize('inclusive', ['both', 'left'])
+@pytest.mark.parametrize('on', [None, ['asset']])
+def test_interval_overlap_join(inclusive, on):
+    rng = np.random.default_rng(0)
+
+    def random_df(n):
+        start = pd.Timestamp('2023-01-01') + pd.to_timedelta(
+            rng.integers(0, 200, n), 'h'
+        )
+        return pd.DataFrame(
+            {
+                'asset': rng.choice(['a', 'b'], n),
+                'value': np.arange(n),
+                'start_date': start,
+                'end_date': start + pd.to_timedelta(rng.integers(-3, 40, n), 'h'),
+            }
+        )
+
+    left, right = random_df(60), random_df(40)
+    result = interval_overlap_join(
+        left, right, 'start_date', 'end_date', on=on, inclusive=inclusive
+    )
+
+    le = operator.le if inclusive == 'both' else operator.lt
+    expected = left[le(left['start_date'], left['end_date'])].merge(
+        right[le(right['start_date'], right['end_date'])],
+        how='cross' if on is None else 'inner',
+        on=on,
+        suffixes=('_left', '_right'),
+    )
+    expected = expected[
+        le(expected['start_date_right'], expected['end_date_left'])
+        & le(expected['start_date_left'], expected['end_date_right'])
+    ]
+    expected = expected.assign(
+        start_date=expected[['start_date_left', 'start_date_right']].max(axis=1),
+        end_date=expected[['end_date_left', 'end_date_right']].min(axis=1),
+    )[result.columns]
+    keys = ['value_left', 'value_right']
+    assert_frame_equal(
+        result.sort_values(keys, ignore_index=True),
+        expected.sort_values(keys, ignore_index=True),
+    )
+
+
+def test_interval_overlap_join_long_interval(monkeypatch):
+    counts = []
+
+    def repeat_counts(c):
+        counts.append(int(c.sum()))
+        return _repeat_counts(c)
+
+    _repeat_counts = pd_datetime._repeat_counts
+    monkeypatch.setattr(pd_datetime, '_repeat_counts', repeat_counts)
+    start = pd.date_range('2023-01-01', periods=1000, freq='h')
+    left = pd.DataFrame(
+        {'start_date': start, 'end_date': start + pd.Timedelta('30min')}
+    )
+    right = pd.DataFrame(
+        {
+            'start_date': [start[500], start[0], start[10]],
+            'end_date': [start[500], start[-1], start[10]],
+        }
+    )
+
+    result = interval_overlap_join(left, right, 'start_date', 'end_date')
+    # the long right interval does not make every left row a candidate of the others
+    assert len(result) == 1002
+    assert sum(counts) == len(result)
+    assert result['start_date'].iloc[:3].tolist() == [start[0], start[1], start[2]]
+    assert result['start_date'].iloc[10:13].tolist() == [
+        start[10],
+        start[10],
+        start[11],
+    ]
+
+
+@pytest.mark.parametrize('drop_index', [True, False])
+def test_n_jobs(monkeypatch, drop_index):
+    monkeypatch.setattr(pd_datetime, '_PARALLEL_MIN_ROWS', 0)
+    rng = np.random.default_rng(0)
+    start = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 100, 50), 'h')
+    df = pd.DataFrame(
+        {
+            'asset': rng.choice(['a', 'b'], 50),
+            'start_date': start,
+            'end_date': start + pd.to_timedelta(rng.integers(-2, 30, 50), 'h'),
+        },
+        index=pd.Index(np.arange(50) * 2, name='id'),
+    )
+
+    kwargs = dict(freq='1h', drop_index=drop_index, encode_strings='category')
+    expected = explode_date_range(df, 'start_date', 'end_date', **kwargs)
+    result = explode_date_range(df, 'start_date', 'end_date', n_jobs=2, **kwargs)
+    assert_frame_equal(result, expected)
+
+    # the workers return positions and weights of their partitions
+    df = df.assign(
+        value=rng.random(50),
+        freq=rng.choice(['30min', '1h', None], 50),
+        start_date=df['start_date'].dt.tz_localize('Australia/Brisbane'),
+        end_date=df['end_date'].dt.tz_localize('Australia/Brisbane'),
+    )
+    kwargs = dict(drop_index=drop_index, apportion_cols=['value'], freq_col='freq')
+    expected = explode_date_range(df, 'start_date', 'end_date', **kwargs)
+    result = explode_date_range(df, 'start_date', 'end_date', n_jobs=2, **kwargs)
+    assert_frame_equal(result, expected)
+
+    with pytest.raises(ValueError, match='n_jobs'):
+        explode_date_range(df, 'start_date', 'end_date', n_jobs=0)
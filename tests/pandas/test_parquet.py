@@ -1,5 +1,13 @@
+import numpy as np
 import pandas as pd
-from mspu.pandas import pa_mod
+from pandas.testing import assert_frame_equal
+from mspu.pandas import (
+    df_diffs,
+    explode_date_range,
+    explode_date_range_to_parquet,
+    pa_mod,
+    parquet_diffs,
+)
 
 
 def test_pa_mod():
@@ -10,3 +18,142 @@ def test_pa_mod():
     assert pa_mod(df['x'], 4).tolist() == [2, 0, 3]
     assert pa_mod(df['x'], 5).tolist() == [3, 2, 3]
     assert pa_mod(df['x'], 8).tolist() == [6, 0, 3]
+
+
+def test_explode_date_range_to_parquet(tmp_path):
+    df = pd.DataFrame(
+        {
+            'site': ['a', 'b', None],
+            'start_date': pd.to_datetime(['2023-01-01', '2023-01-02', '2023-01-03']),
+            'end_date': pd.to_datetime(['2023-01-02', '2023-01-03', '2023-01-04']),
+        }
+    )
+    path = tmp_path / 'exploded.parquet'
+
+    nrow = explode_date_range_to_parquet(
+        df, path, 'start_date', 'end_date', batch_rows=60, inclusive='left'
+    )
+    result = pd.read_parquet(path)
+    expected = explode_date_range(df, 'start_date', 'end_date', inclusive='left')
+
+    assert nrow == 144
+    assert_frame_equal(result, expected)
+
+
+def test_explode_date_range_to_parquet_null_batch(tmp_path):
+    df = pd.DataFrame(
+        {
+            'site': [None, 'b'],
+            'start_date': pd.to_datetime(['2023-01-01', '2023-01-02']),
+            'end_date': pd.to_datetime(['2023-01-01 01:00', '2023-01-02 01:00']),
+        }
+    )
+    path = tmp_path / 'exploded.parquet'
+
+    # the site column of the first batch only has nulls
+    nrow = explode_date_range_to_parquet(
+        df, path, 'start_date', 'end_date', freq='1h', batch_rows=2
+    )
+    result = pd.read_parquet(path)
+    expected = explode_date_range(df, 'start_date', 'end_date', freq='1h')
+
+    assert nrow == 4
+    assert_frame_equal(result, expected)
+
+
+def test_explode_date_range_to_parquet_empty(tmp_path):
+    df = pd.DataFrame(
+        {
+            'site': ['a'],
+            'start_date': pd.to_datetime(['2023-01-02']),
+            'end_date': pd.to_datetime(['2023-01-01']),
+        }
+    )
+    path = tmp_path / 'exploded.parquet'
+
+    nrow = explode_date_range_to_parquet(df, path, 'start_date', 'end_date')
+
+    assert nrow == 0
+    assert pd.read_parquet(path).columns.tolist() == ['site', 'ts']
+
+
+def test_parquet_diffs(tmp_path):
+    rng = np.random.default_rng(0)
+    df1 = pd.DataFrame(
+        {
+            'fruit': rng.choice(['apple', 'banana'], 200),
+            'id': rng.permutation(200),
+            'store': rng.choice(['us', 'uk'], 200),
+            'price': rng.integers(0, 3, 200) + 0.5,
+        }
+    )
+    df2 = df1.sample(frac=0.9, random_state=0)
+    df2.iloc[::7, 3] = 9.5
+    df2 = pd.concat([df2, df1.iloc[:5].assign(fruit='grape')])
+    df1.to_parquet(tmp_path / 'df1.parquet')
+    df2.to_parquet(tmp_path / 'df2.parquet')
+    path = tmp_path / 'diffs.parquet'
+
+    nrow = parquet_diffs(
+        tmp_path / 'df1.parquet',
+        tmp_path / 'df2.parquet',
+        ['fruit', 'id'],
+        path,
+        n_buckets=4,
+        batch_rows=50,
+    )
+    result = pd.read_parquet(path).sort_values(['fruit', 'id'], ignore_index=True)
+    expected = df_diffs(
+        df1.set_index(['fruit', 'id']), df2.set_index(['fruit', 'id'])
+    ).reset_index()
+    # missing strings are None after a round trip
+    expected.to_parquet(tmp_path / 'expected.parquet')
+    expected = pd.read_parquet(tmp_path / 'expected.parquet')
+
+    assert nrow == len(expected) > 0
+    assert_frame_equal(result, expected.sort_values(['fruit', 'id'], ignore_index=True))
+
+
+def test_parquet_diffs_key_types(tmp_path):
+    df1 = pd.DataFrame(
+        {'id': np.array([-1, 2, 3], dtype='int32'), 'price': [1.0, 2, 3]}
+    )
+    df2 = pd.DataFrame(
+        {'id': np.array([-1, 2, 4], dtype='int64'), 'price': [1.0, 2, 3]}
+    )
+    df1.to_parquet(tmp_path / 'df1.parquet')
+    df2.to_parquet(tmp_path / 'df2.parquet')
+    path = tmp_path / 'diffs.parquet'
+
+    nrow = parquet_diffs(
+        tmp_path / 'df1.parquet', tmp_path / 'df2.parquet', ['id'], path, n_buckets=8
+    )
+    result = pd.read_parquet(path).sort_values('id', ignore_index=True)
+
+    assert nrow == 2
+    assert result['id'].tolist() == [3, 4]
+
+
+def test_parquet_diffs_null_key(tmp_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # without pandas metadata, int keys with nulls are read as floats
+    pq.write_table(
+        pa.table({'id': pa.array([1, 2, 3, None]), 'price': [1.0, 2, 3, 4]}),
+        tmp_path / 'df1.parquet',
+    )
+    pq.write_table(
+        pa.table({'id': pa.array([1, 2, 3]), 'price': [1.0, 2, 3]}),
+        tmp_path / 'df2.parquet',
+    )
+    path = tmp_path / 'diffs.parquet'
+
+    nrow = parquet_diffs(
+        tmp_path / 'df1.parquet', tmp_path / 'df2.parquet', ['id'], path, n_buckets=8
+    )
+    result = pd.read_parquet(path)
+
+    assert nrow == 1
+    assert result['id'].isna().all()
+    assert result['price_df1'].tolist() == [4.0]
@@ -1,5 +1,6 @@
 import numpy as np
 import pandas as pd
+import pytest
 from mspu.pandas import df_diffs
 
 
@@ -80,3 +81,60 @@ def test_df_diffs_different_indices():
 
     # Should return rows with all differences
     assert len(result) > 0
+
+
+def test_df_diffs_hash_engine():
+    """Test the hash engine gives the same rows as the merge engine"""
+    rng = np.random.default_rng(0)
+    df1 = pd.DataFrame(
+        {
+            'fruit': rng.choice(['apple', 'banana'], 100),
+            'id': rng.permutation(100),
+            'store': rng.choice(['us', 'uk', None], 100),
+            'price': rng.integers(0, 3, 100) + 0.5,
+        }
+    ).set_index(['fruit', 'id'])
+    df1.iloc[::10, 1] = np.nan
+
+    df2 = df1.sample(frac=0.9, random_state=0)
+    df2.iloc[::7, 1] = 9.5
+    df2.loc[('grape', 1), :] = ['cn', 1.5]
+
+    expected = df_diffs(df1, df2)
+    result = df_diffs(df1, df2, engine='hash')
+    pd.testing.assert_frame_equal(result, expected)
+    assert not result.empty
+
+    # non-unique index falls back to the merge engine
+    df3 = pd.concat([df2, df2.iloc[:3]])
+    pd.testing.assert_frame_equal(df_diffs(df1, df3, engine='hash'), df_diffs(df1, df3))
+
+
+@pytest.mark.parametrize('engine', ['sorted', 'auto'])
+@pytest.mark.parametrize('multi_index', [True, False])
+def test_df_diffs_sorted_engine(engine, multi_index):
+    """Test the sorted engine gives the same rows as the merge engine"""
+    rng = np.random.default_rng(0)
+    df1 = pd.DataFrame(
+        {
+            'fruit': rng.choice(['apple', 'banana'], 100),
+            'id': rng.permutation(100),
+            'store': rng.choice(['us', 'uk', None], 100),
+            'price': rng.integers(0, 3, 100) + 0.5,
+        }
+    ).set_index(['fruit', 'id'])
+    df1.iloc[::10, 1] = np.nan
+    df2 = df1.sample(frac=0.9, random_state=0)
+    df2.iloc[::7, 1] = 9.5
+    df2.loc[('grape', 1), :] = ['cn', 1.5]
+    if not multi_index:
+        df1, df2 = df1.droplevel('fruit'), df2.droplevel('fruit')
+        df2 = df2[~df2.index.duplicated()]
+    df1, df2 = df1.sort_index(), df2.sort_index()
+
+    result = df_diffs(df1, df2, engine=engine)
+    pd.testing.assert_frame_equal(result, df_diffs(df1, df2))
+    assert not result.empty
+    pd.testing.assert_frame_equal(
+        df_diffs(df1, df1.copy(), engine=engine), df_diffs(df1, df1.copy())
+    )
@@ -0,0 +1,202 @@
+import polars as pl
+import pytest
+from datetime import datetime
+from polars.testing import assert_frame_equal
+from mspu.polars import (
+    collapse_date_range,
+    explode_date_range,
+    interval_timeline_sum,
+)
+
+
+def test_basic():
+    df = pl.DataFrame(
+        {
+            'id': [1, 2],
+            'start_date': ['2023-01-01 00:00:00', '2023-01-02 00:00:00'],
+            'end_date': ['2023-01-01 01:00:00', '2023-01-02 02:00:00'],
+        }
+    )
+
+    result = explode_date_range(df, 'start_date', 'end_date', freq='1h')
+    expected = pl.DataFrame(
+        {
+            'id': [1, 1, 2, 2, 2],
+            'ts': [
+                datetime(2023, 1, 1, 0),
+                datetime(2023, 1, 1, 1),
+                datetime(2023, 1, 2, 0),
+                datetime(2023, 1, 2, 1),
+                datetime(2023, 1, 2, 2),
+            ],
+        }
+    )
+
+    assert_frame_equal(result, expected)
+
+
+def test_lazy_with_options():
+    df = pl.LazyFrame(
+        {
+            'id': [1, 2, 3],
+            'start_date': [
+                datetime(2023, 1, 1, 0, 30),
+                datetime(2023, 1, 2, 0, 30),
+                None,
+            ],
+            'end_date': [
+                datetime(2023, 1, 1, 1, 30),
+                datetime(2023, 1, 2, 2, 30),
+                datetime(2023, 1, 1, 0, 30),
+            ],
+        }
+    )
+
+    result = explode_date_range(
+        df,
+        'start_date',
+        'end_date',
+        freq='1h',
+        start_date_offset='1h',
+        start_date_roll='backward',
+        end_date_roll='backward',
+        min_date='2023-01-01 00:00:00',
+        drop_date_cols=False,
+    )
+    expected = pl.DataFrame(
+        {
+            'id': [1, 2, 2, 3],
+            'start_date': [
+                datetime(2023, 1, 1, 1),
+                datetime(2023, 1, 2, 1),
+                datetime(2023, 1, 2, 1),
+                datetime(2023, 1, 1),
+            ],
+            'end_date': [
+                datetime(2023, 1, 1, 1),
+                datetime(2023, 1, 2, 2),
+                datetime(2023, 1, 2, 2),
+                datetime(2023, 1, 1),
+            ],
+            'ts': [
+                datetime(2023, 1, 1, 1),
+                datetime(2023, 1, 2, 1),
+                datetime(2023, 1, 2, 2),
+                datetime(2023, 1, 1),
+            ],
+        }
+    )
+
+    assert isinstance(result, pl.LazyFrame)
+    assert_frame_equal(result.collect(), expected)
+
+
+@pytest.mark.parametrize(
+    'min_date',
+    ['2023-01-01 01:00:00', datetime.fromisoformat('2022-12-31 14:00:00+00:00')],
+)
+def test_min_max_date_tz(min_date):
+    df = pl.DataFrame(
+        {
+            'start_date': ['2023-01-01 00:00:00', None],
+            'end_date': ['2023-01-01 03:00:00', '2023-01-01 02:00:00'],
+        }
+    ).with_columns(pl.all().str.to_datetime().dt.replace_time_zone('Australia/Sydney'))
+
+    # the bounds are in the time zone of the date columns
+    result = explode_date_range(
+        df,
+        'start_date',
+        'end_date',
+        freq='1h',
+        min_date=min_date,
+        max_date='2023-01-01 02:00:00',
+    )
+    expected = pl.DataFrame(
+        {'ts': [datetime(2023, 1, 1, 1), datetime(2023, 1, 1, 2)] * 2}
+    ).with_columns(
+        pl.col('ts').dt.cast_time_unit('us').dt.replace_time_zone('Australia/Sydney')
+    )
+
+    assert_frame_equal(result, expected)
+
+
+def test_collapse_date_range():
+    df = pl.DataFrame(
+        {
+            'asset': ['a', 'a', 'b', 'a', 'a'],
+            'status': ['on', 'on', 'on', 'off', 'on'],
+            'ts': [
+                datetime(2023, 1, 1, 0, 30),
+                datetime(2023, 1, 1, 0, 0),
+                datetime(2023, 1, 1, 0, 0),
+                datetime(2023, 1, 1, 1, 0),
+                datetime(2023, 1, 1, 1, 30),
+            ],
+        }
+    )
+
+    result = collapse_date_range(
+        df.lazy(), 'start_date', 'end_date', inclusive='left'
+    ).collect()
+    expected = pl.DataFrame(
+        {
+            'asset': ['a', 'a', 'a', 'b'],
+            'status': ['off', 'on', 'on', 'on'],
+            'start_date': [
+                datetime(2023, 1, 1, 1, 0),
+                datetime(2023, 1, 1, 0, 0),
+                datetime(2023, 1, 1, 1, 30),
+                datetime(2023, 1, 1, 0, 0),
+            ],
+            'end_date': [
+                datetime(2023, 1, 1, 1, 30),
+                datetime(2023, 1, 1, 1, 0),
+                datetime(2023, 1, 1, 2, 0),
+                datetime(2023, 1, 1, 0, 30),
+            ],
+        }
+    )
+
+    assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('freq', ['30m', '1h', '1mo'])
+@pytest.mark.parametrize('inclusive', ['both', 'left', 'right', 'neither'])
+def test_interval_timeline_sum(freq, inclusive):
+    df = pl.DataFrame(
+        {
+            'asset': ['a', 'a', 'b', 'a'],
+            'start_date': [
+                datetime(2023, 1, 1, 0, 0),
+                datetime(2023, 1, 1, 1, 10),
+                datetime(2023, 1, 1, 0, 0),
+                datetime(2023, 2, 1, 0, 0),
+            ],
+            'end_date': [
+                datetime(2023, 1, 3, 0, 0),
+                datetime(2023, 3, 2, 3, 0),
+                datetime(2023, 1, 1, 2, 0),
+                datetime(2023, 2, 5, 0, 0),
+            ],
+            'capacity': [10, 5, 2, 1],
+            'volume': [1.5, 2.5, None, 4.0],
+        }
+    )
+
+    result = interval_timeline_sum(
+        df.lazy(),
+        'start_date',
+        'end_date',
+        ['capacity', 'volume'],
+        freq=freq,
+        by=['asset'],
+        inclusive=inclusive,
+    ).collect()
+    expected = (
+        explode_date_range(df, 'start_date', 'end_date', freq=freq, inclusive=inclusive)
+        .group_by('asset', 'ts')
+        .agg(pl.col('capacity', 'volume').sum())
+        .sort('asset', 'ts')
+    )
+    assert_frame_equal(result, expected)